@@ -12,6 +12,11 @@ from pathlib import Path
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+# Keep native math libraries single-threaded alongside the pipeline threads;
+# must be set before numpy/OpenCV load
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
 from src.app_opencv import EyeBlinkTrackerApp
 
 def setup_logging():
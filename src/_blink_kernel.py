@@ -0,0 +1,129 @@
+"""
+Per-frame EAR arithmetic for the MediaPipe blink detector
+Compiled with Numba when it is installed, plain Python otherwise.
+Both paths update the histories in constant time via running sums.
+"""
+
+import logging
+import math
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logging.getLogger(__name__).info("numba not installed - EAR kernel runs as plain Python")
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Ring buffer state slots: next write index, filled count, running sum
+RING_IDX = 0
+RING_FILLED = 1
+RING_SUM = 2
+
+# Rows of the packed history and state arrays
+EAR_ROW = 0
+BASELINE_ROW = 1
+
+
+@njit(cache=True, fastmath=True)
+def _dist(points, i, j):
+    """Distance between two rows of a points array"""
+    dx = points[i, 0] - points[j, 0]
+    dy = points[i, 1] - points[j, 1]
+    return math.sqrt(dx * dx + dy * dy)
+
+
+@njit(cache=True, fastmath=True)
+def _eye_ear(points, o):
+    """EAR of the six-point eye starting at row o, 0 for a degenerate eye"""
+    horizontal = _dist(points, o, o + 3)
+    if horizontal == 0.0:
+        return 0.0
+    return (_dist(points, o + 1, o + 5) + _dist(points, o + 2, o + 4)) / (2.0 * horizontal)
+
+
+@njit(cache=True, fastmath=True)
+def mean_ear(points):
+    """
+    Average EAR of both eyes
+
+    Args:
+        points: 12x2 array of left eye (rows 0-5) then right eye (rows 6-11)
+    """
+    return (_eye_ear(points, 0) + _eye_ear(points, 6)) / 2.0
+
+
+@njit(cache=True, fastmath=True)
+def ring_push(buf, state, value):
+    """
+    Overwrite the oldest slot of a ring buffer and return the new mean
+
+    Args:
+        buf: Ring buffer storage
+        state: float64[3] of (next index, filled count, running sum)
+        value: Value to add
+    """
+    idx = int(state[RING_IDX])
+    state[RING_SUM] -= buf[idx]
+    buf[idx] = value
+    # Add the stored value so the sum tracks the buffer's precision
+    state[RING_SUM] += buf[idx]
+    state[RING_IDX] = (idx + 1) % buf.shape[0]
+    if state[RING_FILLED] < buf.shape[0]:
+        state[RING_FILLED] += 1
+    return state[RING_SUM] / state[RING_FILLED]
+
+
+@njit(cache=True, fastmath=True)
+def adaptive_threshold(baseline, adaptive, ear_threshold, drop_threshold):
+    """Baseline minus drop threshold, clamped to 0.15-0.30"""
+    if not adaptive or baseline == 0.0:
+        return ear_threshold
+    threshold = baseline - drop_threshold
+    if threshold < 0.15:
+        return 0.15
+    if threshold > 0.30:
+        return 0.30
+    return threshold
+
+
+@njit(cache=True, fastmath=True)
+def update_histories(hist, state, ear_size, baseline_size, ear, baseline, adaptive, ear_threshold):
+    """
+    Advance the EAR smoothing and baseline ring buffers
+
+    Args:
+        hist: float32[2, N] packed histories (EAR_ROW, BASELINE_ROW)
+        state: float64[2, 3] ring state for each row
+        ear_size, baseline_size: Ring lengths within each row
+
+    Returns:
+        Tuple of (smoothed EAR, baseline EAR)
+    """
+    ear = ring_push(hist[EAR_ROW, :ear_size], state[EAR_ROW], ear)
+
+    # Baseline only learns from open eyes
+    if adaptive and ear > ear_threshold:
+        baseline = ring_push(hist[BASELINE_ROW, :baseline_size], state[BASELINE_ROW], ear)
+
+    return ear, baseline
+
+
+@njit(cache=True, fastmath=True)
+def ear_update(points, hist, state, ear_size, baseline_size,
+               baseline, adaptive, ear_threshold, drop_threshold):
+    """
+    Run one frame of EAR math: mean EAR, smoothing, baseline and threshold
+
+    Returns:
+        Tuple of (smoothed EAR, baseline EAR, threshold)
+    """
+    ear, baseline = update_histories(hist, state, ear_size, baseline_size, mean_ear(points),
+                                     baseline, adaptive, ear_threshold)
+    return ear, baseline, adaptive_threshold(baseline, adaptive, ear_threshold, drop_threshold)
@@ -3,11 +3,17 @@ Main Application Class for Eye Blink Tracker - OpenCV Version
 Integrates with web dashboard (no dlib required)
 """
 
+import ctypes
 import logging
+import os
+import queue
+import sys
 import threading
 import time
 from pathlib import Path
 
+import cv2
+
 from camera_manager import CameraManager
 try:
     from blink_detector_mediapipe import BlinkDetectorMediaPipe
@@ -21,6 +27,39 @@ from database import DatabaseManager
 from health_insights import HealthInsightsMonitor
 from health_notifier import HealthNotifier
 
+
+def _reserve_cpus():
+    """Pick dedicated cores for the capture and detect threads (Linux only)"""
+    if not hasattr(os, 'sched_getaffinity'):
+        return {}
+    cpus = sorted(os.sched_getaffinity(0))
+    # Leave core 0 to the OS and the web server; don't pin on small machines
+    if len(cpus) < 3:
+        return {}
+    return {'capture': cpus[1], 'detect': cpus[2]}
+
+_THREAD_CPUS = _reserve_cpus()
+QOS_CLASS_USER_INTERACTIVE = 0x21
+
+
+def _pin_current_thread(role):
+    """Keep a hot-loop thread on one core (Linux) or raise its QoS class (macOS)
+    
+    Stops the scheduler migrating the thread between cores, which would throw
+    away its cache warmth every quantum. Best effort: failures are ignored.
+    """
+    try:
+        if sys.platform.startswith('linux'):
+            cpu = _THREAD_CPUS.get(role)
+            if cpu is not None:
+                # pid 0 is the calling thread, not the whole process
+                os.sched_setaffinity(0, {cpu})
+        elif sys.platform == 'darwin':
+            libsystem = ctypes.CDLL('/usr/lib/libSystem.dylib')
+            libsystem.pthread_set_qos_class_self_np(QOS_CLASS_USER_INTERACTIVE, 0)
+    except (OSError, AttributeError) as e:
+        logging.getLogger(__name__).debug(f"Could not pin {role} thread: {e}")
+
 class EyeBlinkTrackerApp:
     """Main application class that coordinates all components - OpenCV version"""
     
@@ -47,12 +86,54 @@ class EyeBlinkTrackerApp:
         self.is_running = False
         self.is_tracking = False
         self.tracking_thread = None
+        self._exc_count = 0  # Frame processing errors this session
+        
+        # Hand-off between the capture, detection and dispatch stages. The
+        # dispatcher only ever needs the newest stats, so those are coalesced
+        # into a single slot instead of queued.
+        self._capture_queue = queue.Queue(maxsize=2)
+        self._last_stats = None
+        self._stats_event = threading.Event()
+        # Frame buffers the capture stage can decode into again, instead of
+        # allocating a new array per frame. Buffers come back once detection
+        # is done with them, so the pool never grows past what is in flight.
+        self._frame_pool = queue.SimpleQueue()
+        self.broadcast_interval = 1.0  # Seconds between dashboard updates
+        
+        # Pipeline metrics for spotting the bottleneck stage. Rates and
+        # latencies are exponentially weighted moving averages.
+        self.metrics = self._new_metrics()
         
         # Health monitoring
         self.health_monitor = HealthInsightsMonitor()
         self.health_notifier = HealthNotifier()
-        self.last_health_check = 0
         self.health_check_interval = 30  # Check every 30 seconds
+        self._next_health_check = time.monotonic() + self.health_check_interval
+        
+        # Frame pacing
+        self.target_fps = 30
+        # Most frames a backend without CAP_PROP_BUFFERSIZE support can queue
+        self.max_drain_grabs = 4
+        
+        # Frames wider than this are downscaled before detection; eye
+        # landmarks don't need more, and fewer pixels means less work
+        self.max_frame_width = 640
+        self.frame_scale = 1.0  # Detector frame size relative to camera frame
+        
+        # Blinks last 100-400ms, so detecting on every 2nd frame at 30 FPS
+        # still samples each blink several times
+        self.detect_every_n = 2
+        
+        # The Haar cascades only look at grayscale, so the OpenCV detector is
+        # fed a single-channel frame converted once here. Its cvtColor, resize
+        # and cascade calls also accept UMat, letting the transparent API run
+        # them on an OpenCL device (usually the iGPU). MediaPipe needs color
+        # host arrays, so it gets the plain BGR frame on the CPU.
+        self.detector_uses_gray = not MEDIAPIPE_AVAILABLE
+        self.use_opencl = not MEDIAPIPE_AVAILABLE and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+            self.logger.info("OpenCL available, offloading frame processing via UMat")
         
         mode = "MediaPipe" if MEDIAPIPE_AVAILABLE else "OpenCV"
         self.logger.info(f"Eye Blink Tracker initialized ({mode} mode)")
@@ -72,6 +153,7 @@ class EyeBlinkTrackerApp:
             self.tracking_thread = threading.Thread(target=self._tracking_loop, daemon=True)
             self.tracking_thread.start()
             
+            self.system_tray.mark_dirty()
             mode = "MediaPipe" if MEDIAPIPE_AVAILABLE else "OpenCV"
             self.logger.info(f"Eye blink tracking started ({mode} mode)")
             return True
@@ -88,6 +170,7 @@ class EyeBlinkTrackerApp:
             return False
             
         self.blink_detector.pause()
+        self.system_tray.mark_dirty()
         self.logger.info("Eye blink tracking paused")
         return True
     
@@ -98,6 +181,7 @@ class EyeBlinkTrackerApp:
             return False
             
         self.blink_detector.resume()
+        self.system_tray.mark_dirty()
         self.logger.info("Eye blink tracking resumed")
         return True
     
@@ -108,16 +192,30 @@ class EyeBlinkTrackerApp:
             return False
             
         self.is_tracking = False
-        self.blink_detector.stop()
-        
+        # The tracking loop stops the detector itself on the way out, so the
+        # final flush happens on the thread that appends to the blink queue
         if self.tracking_thread and self.tracking_thread.is_alive():
             self.tracking_thread.join(timeout=5)
-            
+        
+        self.system_tray.mark_dirty()
         self.logger.info("Eye blink tracking stopped")
         return True
     
     def _tracking_loop(self):
-        """Main tracking loop that runs in a separate thread"""
+        """Main tracking loop that runs in a separate thread
+        
+        Runs the detection stage of a three-stage pipeline:
+        capture -> detect -> dispatch (broadcast + health checks).
+        Capture feeds detection through a small bounded queue and detection
+        publishes its latest stats to the dispatcher, so throughput is set by
+        the slowest stage rather than the sum of all of them.
+        
+        Detection deliberately stays a thread in this process: the web server
+        and tray read and change detector state directly (pause, settings,
+        stats), and the heavy cv2/MediaPipe calls release the GIL anyway.
+        """
+        capture_thread = None
+        dispatch_thread = None
         try:
             # Get or select active camera
             camera = self.camera_manager.get_active_camera()
@@ -134,65 +232,316 @@ class EyeBlinkTrackerApp:
                 self.is_tracking = False
                 return
                 
+            # Keep the driver queue to a single frame so reads are never stale.
+            # Some backends ignore this, in which case we drain it ourselves.
+            drain_buffer = not camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if drain_buffer:
+                self.logger.info("Camera backend ignores CAP_PROP_BUFFERSIZE, draining queued frames")
+                
             mode = "MediaPipe" if MEDIAPIPE_AVAILABLE else "OpenCV"
             self.logger.info(f"Starting detection with camera ({mode} mode)")
             self.blink_detector.start_detection(camera)
             
+            # Start the capture and dispatch stages around this detection stage
+            self._capture_queue = queue.Queue(maxsize=2)
+            self._last_stats = None
+            self._stats_event.clear()
+            self._frame_pool = queue.SimpleQueue()
+            self.metrics = self._new_metrics()
+            capture_thread = threading.Thread(target=self._capture_loop,
+                                              args=(camera, drain_buffer), daemon=True)
+            dispatch_thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+            capture_thread.start()
+            dispatch_thread.start()
+            # Pin only once the stage threads exist: new threads inherit the
+            # creating thread's affinity, and dispatch must not share this core
+            _pin_current_thread('detect')
+            
             frame_count = 0
-            failed_frames = 0
+            target_size = None
+            self._exc_count = 0
             
             while self.is_tracking:
                 try:
-                    # Read frame directly from camera
-                    ret, frame = camera.read()
-                    if not ret or frame is None:
-                        failed_frames += 1
-                        if failed_frames > 30:
-                            self.logger.error("Too many failed frame reads, stopping tracking")
-                            break
-                        time.sleep(0.1)
-                        continue
-                    
-                    failed_frames = 0  # Reset on successful read
-                    frame_count += 1
-                    
-                    # Process frame for blink detection
-                    if not self.blink_detector.process_frame(frame):
-                        self.logger.debug("Frame processing returned False")
-                        
-                    # Broadcast updates to web dashboard every 30 frames (~1 second)
-                    if frame_count % 30 == 0:
-                        self.web_server.broadcast_status_update()
-                    
-                    # Health monitoring (check every 30 seconds)
-                    current_time = time.time()
-                    if current_time - self.last_health_check > self.health_check_interval:
-                        self._check_health_insights()
-                        self.last_health_check = current_time
-                        
-                    # Log progress periodically
-                    if frame_count % 100 == 0:
-                        stats = self.blink_detector.get_stats()
-                        self.logger.info(f"Processed {frame_count} frames | "
-                                       f"Blinks: {stats.get('session_blinks', 0)} | "
-                                       f"Eyes: {stats.get('eyes_detected', False)}")
-                        
-                    # Small delay for ~30 FPS
-                    time.sleep(0.033)
+                    frame = self._capture_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
                     
+                frame_count += 1
+                buffer = frame
+                self.metrics['queue_depth'] = self._capture_queue.qsize()
+                
+                # Work out the detector frame size once from the first frame
+                if target_size is None:
+                    height, width = frame.shape[:2]
+                    if width > self.max_frame_width:
+                        self.frame_scale = self.max_frame_width / width
+                        target_size = (self.max_frame_width, int(round(height * self.frame_scale)))
+                        self.logger.info(f"Downscaling frames from {width}x{height} to "
+                                         f"{target_size[0]}x{target_size[1]} for detection")
+                    else:
+                        self.frame_scale = 1.0
+                        target_size = (width, height)
+                
+                if self.use_opencl:
+                    frame = cv2.UMat(frame)
+                
+                if self.detector_uses_gray:
+                    # Convert first so the resize touches a third of the bytes
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                
+                if self.frame_scale != 1.0:
+                    frame = cv2.resize(frame, target_size, interpolation=cv2.INTER_LINEAR)
+                
+                # Process frame for blink detection; only the detector is
+                # expected to fail per frame, so only it is guarded
+                started = time.perf_counter_ns()
+                try:
+                    if self.detector_uses_gray:
+                        ok = self.blink_detector.process_frame(gray=frame)
+                    else:
+                        ok = self.blink_detector.process_frame(frame)
                 except Exception as e:
-                    self.logger.error(f"Error processing frame: {e}", exc_info=True)
+                    # Full tracebacks are expensive, only log them for the first
+                    # few errors and then periodically from a flapping camera
+                    self._exc_count += 1
+                    if self._exc_count <= 3 or self._exc_count % 100 == 0:
+                        self.logger.error(f"Error processing frame ({self._exc_count} so far): {e}",
+                                          exc_info=True)
+                    else:
+                        self.logger.error(f"Error processing frame: {e}")
                     time.sleep(0.1)
+                    continue
+                finally:
+                    # Detectors don't keep frames past process_frame, so the
+                    # buffer can be handed back for the next capture
+                    self._frame_pool.put(buffer)
+                    
+                det_ms = (time.perf_counter_ns() - started) / 1e6
+                self.metrics['det_ms'] = 0.9 * self.metrics['det_ms'] + 0.1 * det_ms
+                self.metrics['frames_detected'] += 1
+                    
+                if not ok and self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("Frame processing returned False")
+                
+                # Publish the result to the dispatch stage
+                self._last_stats = (frame_count, self.blink_detector.get_stats())
+                self._stats_event.set()
                 
         except Exception as e:
             self.logger.error(f"Error in tracking loop: {e}", exc_info=True)
         finally:
+            self.is_tracking = False
+            # The capture thread must be done with the camera before release
+            if capture_thread and capture_thread.is_alive():
+                capture_thread.join(timeout=2)
+            if dispatch_thread and dispatch_thread.is_alive():
+                dispatch_thread.join(timeout=2)
+            # Flush queued blinks and end the session, also when tracking
+            # ended on its own and stop_tracking() will return early
+            try:
+                self.blink_detector.stop()
+            except Exception as e:
+                self.logger.error(f"Error stopping blink detector: {e}")
             self.logger.info("Tracking loop ending, releasing camera")
             self.camera_manager.release_camera()
-            self.is_tracking = False
-            # Notify web dashboard that tracking stopped
+            # Notify the tray and web dashboard that tracking stopped, which
+            # may have happened on its own (camera failure or an error)
+            self.system_tray.mark_dirty()
+            self.web_server.invalidate_stats()
             self.web_server.broadcast_status_update()
     
+    def _grab_latest(self, camera, fresh_after):
+        """Grab until the driver queue is empty, returning False if a grab failed
+        
+        A grab returning within fresh_after seconds took an already queued
+        frame, so keep going; one that had to wait got a fresh frame.
+        """
+        for _ in range(self.max_drain_grabs):
+            started = time.perf_counter()
+            if not camera.grab():
+                return False
+            if time.perf_counter() - started >= fresh_after:
+                break
+        return True
+    
+    def _capture_loop(self, camera, drain_buffer):
+        """Capture stage: read frames from the camera into the capture queue"""
+        _pin_current_thread('capture')
+        failed_frames = 0
+        frames_until_detect = self.detect_every_n
+        
+        # Pace the loop against a monotonic deadline so read time
+        # is absorbed into the frame period instead of added to it
+        frame_period = 1.0 / self.target_fps
+        next_frame_time = time.monotonic()
+        last_capture_time = None
+        
+        try:
+            while self.is_tracking:
+                # Count down to the next frame that goes to the detector
+                frames_until_detect -= 1
+                skip = frames_until_detect > 0
+                if not skip:
+                    frames_until_detect = self.detect_every_n
+                
+                # Decode into a recycled buffer when one is free; with None
+                # OpenCV allocates and the new array joins the pool after use
+                buffer = None
+                if not skip:
+                    try:
+                        buffer = self._frame_pool.get_nowait()
+                    except queue.Empty:
+                        pass
+                
+                if skip:
+                    # Pull the frame off the driver queue without decoding it
+                    ret, frame = camera.grab(), None
+                elif drain_buffer:
+                    # Frames only queue up in the driver while this loop falls
+                    # behind, so drain after a stall and otherwise just take the
+                    # next one; draining every read would wait out whole periods
+                    stalled = (last_capture_time is not None and
+                               time.monotonic() - last_capture_time > 1.5 * frame_period)
+                    ret, frame = (self._grab_latest(camera, frame_period / 2)
+                                  if stalled else camera.grab()), None
+                    if ret:
+                        ret, frame = camera.retrieve(buffer)
+                else:
+                    ret, frame = camera.read(buffer)
+                    
+                if not ret or (frame is None and not skip):
+                    failed_frames += 1
+                    if failed_frames > 30:
+                        self.logger.error("Too many failed frame reads, stopping tracking")
+                        self.is_tracking = False
+                        break
+                    # Block on the driver for its next frame instead of sleeping a
+                    # fixed 100ms; only back off briefly if it has nothing to give
+                    if not camera.grab():
+                        time.sleep(0.01)
+                        continue
+                    if not skip:
+                        ret, frame = camera.retrieve(buffer)
+                        if not ret or frame is None:
+                            continue
+                else:
+                    # Decay instead of resetting, so failures only add up to an
+                    # abort when they outnumber successful reads
+                    failed_frames = max(0, failed_frames - 1)
+                
+                now = time.monotonic()
+                if last_capture_time is not None and now > last_capture_time:
+                    fps = 1.0 / (now - last_capture_time)
+                    self.metrics['cap_fps'] = 0.9 * self.metrics['cap_fps'] + 0.1 * fps
+                last_capture_time = now
+                self.metrics['frames_captured'] += 1
+                
+                # Never block on a slow detector, drop the oldest frame instead
+                if not skip:
+                    dropped = self._put_latest(self._capture_queue, frame)
+                    if dropped is not None:
+                        self._frame_pool.put(dropped)
+                        self.metrics['drops'] += 1
+                
+                # Sleep only for the remainder of the frame period
+                next_frame_time += frame_period
+                sleep_for = next_frame_time - time.monotonic()
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+                else:
+                    # Overran the deadline, resync instead of bursting
+                    next_frame_time = time.monotonic()
+                    
+        except Exception as e:
+            self.logger.error(f"Error in capture loop: {e}", exc_info=True)
+            self.is_tracking = False
+    
+    def _dispatch_loop(self):
+        """Dispatch stage: broadcast status and run health checks off the detection path
+        
+        Wakes when new stats are published (or once a second when idle) and
+        coalesces everything since the last tick into a single broadcast.
+        """
+        next_broadcast = time.monotonic()
+        self._next_health_check = next_broadcast + self.health_check_interval
+        next_log_frame = 100
+        last_blinks = None
+        
+        while self.is_tracking:
+            self._stats_event.wait(timeout=1.0)
+            self._stats_event.clear()
+            
+            latest = self._last_stats
+            if latest is None:
+                continue
+            frame_count, stats = latest
+                
+            try:
+                # Refresh the tray tooltip when the blink count moves
+                now = time.monotonic()
+                blinks = stats.get('session_blinks', 0)
+                if blinks != last_blinks:
+                    self.system_tray.mark_dirty()
+                    # A new blink pushes its stats to the dashboard, which
+                    # covers the next periodic status update
+                    if last_blinks is not None and blinks > last_blinks:
+                        self.web_server.queue_blink_detected(stats)
+                        next_broadcast = now + self.broadcast_interval
+                    last_blinks = blinks
+                
+                # Broadcast updates to web dashboard at most once per interval
+                if now >= next_broadcast:
+                    self.web_server.queue_status_update(stats)
+                    next_broadcast = now + self.broadcast_interval
+                
+                # Health monitoring (check every 30 seconds)
+                if now >= self._next_health_check:
+                    self._check_health_insights(stats)
+                    self._next_health_check = now + self.health_check_interval
+                    
+                # Log progress periodically
+                if frame_count >= next_log_frame:
+                    self.logger.info(f"Processed {frame_count} frames | "
+                                   f"Blinks: {stats.get('session_blinks', 0)} | "
+                                   f"Eyes: {stats.get('eyes_detected', False)}")
+                    next_log_frame = frame_count + 100
+                    
+            except Exception as e:
+                self.logger.error(f"Error in dispatch loop: {e}", exc_info=True)
+    
+    @staticmethod
+    def _new_metrics():
+        """Create a zeroed pipeline metrics dict"""
+        return {
+            'cap_fps': 0.0,          # Camera frames per second (EWMA)
+            'det_ms': 0.0,           # Detector latency per frame in ms (EWMA)
+            'queue_depth': 0,        # Capture queue fill when a frame is taken
+            'queue_capacity': 2,
+            'frames_captured': 0,
+            'frames_detected': 0,
+            'drops': 0               # Frames dropped because detection fell behind
+        }
+    
+    @staticmethod
+    def _put_latest(q, item):
+        """
+        Put an item on a bounded queue, dropping the oldest entry when full
+        
+        Returns:
+            The dropped entry, or None if nothing had to be dropped
+        """
+        dropped = None
+        while True:
+            try:
+                q.put_nowait(item)
+                return dropped
+            except queue.Full:
+                try:
+                    dropped = q.get_nowait()
+                except queue.Empty:
+                    pass
+    
     def get_status(self):
         """Get current application status"""
         return {
@@ -200,7 +549,8 @@ class EyeBlinkTrackerApp:
             'is_tracking': self.is_tracking,
             'camera_available': self.camera_manager.is_camera_available(),
             'active_camera': self.camera_manager.get_active_camera_info(),
-            'tracking_stats': self.blink_detector.get_stats()
+            'tracking_stats': self.blink_detector.get_stats(),
+            'pipeline_metrics': dict(self.metrics)
         }
     
     def run(self):
@@ -250,14 +600,22 @@ class EyeBlinkTrackerApp:
             
         if hasattr(self, 'db_manager'):
             self.db_manager.close()
+        
+        if MEDIAPIPE_AVAILABLE:
+            BlinkDetectorMediaPipe.shutdown_face_mesh()
             
         self.logger.info("Application shutdown complete")
     
-    def _check_health_insights(self):
-        """Check health insights and show alerts"""
+    def _check_health_insights(self, stats=None):
+        """Check health insights and show alerts
+        
+        Args:
+            stats: Detector statistics already gathered for this frame, if any
+        """
         try:
-            # Get current statistics
-            stats = self.blink_detector.get_stats()
+            # Get current statistics unless the caller already has them
+            if stats is None:
+                stats = self.blink_detector.get_stats()
             bpm = stats.get('blinks_per_minute', 0)
             duration = stats.get('session_duration', 0)
             
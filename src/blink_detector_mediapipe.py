@@ -8,9 +8,19 @@ import cv2
 import numpy as np
 import time
 import logging
+import threading
+from datetime import datetime
 from typing import Optional, Dict, Tuple
 import mediapipe as mp
 
+from _blink_kernel import (
+    mean_ear, ring_push, adaptive_threshold, ear_update, EAR_ROW, BASELINE_ROW
+)
+
+
+def _noop(*args, **kwargs):
+    """Stand-in for a blink hook that has nothing to do"""
+
 
 class BlinkDetectorMediaPipe:
     """
@@ -22,18 +32,41 @@ class BlinkDetectorMediaPipe:
     LEFT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
     RIGHT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
     
-    def __init__(self, db_manager=None):
+    # Longest a queued blink waits before it is written to the database
+    BLINK_FLUSH_MS = 1000
+    
+    # FaceMesh instances shared by all detectors, keyed by constructor options.
+    # Loading the models is slow, so they live until shutdown_face_mesh().
+    _face_meshes = {}
+    _face_mesh_lock = threading.Lock()
+    
+    def __init__(self, db_manager=None, use_iris=False):
+        """
+        Args:
+            db_manager: Optional database manager for saving blinks
+            use_iris: Run Face Mesh's iris refinement model. The EAR landmarks
+                are all outer-eye points, so it is off by default.
+        """
         self.logger = logging.getLogger(__name__)
         self.db_manager = db_manager
+        self._use_iris = use_iris
         
         # Initialize MediaPipe Face Mesh
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        self.face_mesh = self._get_face_mesh(use_iris)
+        
+        # Face Mesh input is capped at this size (width, height), keeping the
+        # aspect ratio. The landmark model runs on a small crop internally, and
+        # landmarks come back normalized, so EAR is unaffected.
+        self.input_size = (320, 240)
+        self._input_shape = None  # (frame shape, input_size) the cached target is for
+        self._input_target = None
+        self._rgb_buf = None  # reused RGB input for Face Mesh
+        
+        # Run Face Mesh on every Nth frame; others reuse the last EAR
+        self.process_every_n = 1
+        self._frame_tick = 0
+        self._last_ear = 0.0
         
         # Detection parameters - identical to web app
         self.EAR_THRESHOLD = 0.25
@@ -43,6 +76,7 @@ class BlinkDetectorMediaPipe:
         self.EAR_DROP_THRESHOLD = 0.08
         self.GLASSES_MODE = False
         self.GLASSES_EAR_DROP = 0.06
+        self._active_drop = self.EAR_DROP_THRESHOLD  # drop for the current glasses mode
         
         # State tracking
         self.blink_counter = 0
@@ -52,19 +86,36 @@ class BlinkDetectorMediaPipe:
         self.eyes_closed = False
         self.eyes_closed_start_time = None
         
-        # EAR history for smoothing
-        self.ear_history = []
-        self.ear_history_size = 3
+        # Both eyes' landmark indices in one array, gathered into a reused buffer
+        self._eye_idx = np.array(self.LEFT_EYE_INDICES + self.RIGHT_EYE_INDICES, dtype=np.int32)
+        self._eye_slots = list(enumerate(self._eye_idx.tolist()))  # (buffer row, landmark index)
+        self._eye_buf = np.empty((len(self._eye_idx), 2), dtype=np.float32)
         
-        # Baseline tracking for adaptive detection
-        self.baseline_ear = 0
-        self.baseline_history = []
+        # EAR smoothing and baseline histories are ring buffers packed as rows
+        # of one array; each row's state is (index, filled, running sum)
+        self.ear_history_size = 3
+        self.baseline_ear = 0.0
         self.baseline_history_size = 30
+        self._hist = np.zeros((2, max(self.ear_history_size, self.baseline_history_size)),
+                              dtype=np.float32)
+        # Samples are float32 like the landmarks; running sums stay float64 so
+        # repeated add/subtract does not drift
+        self._hist_state = np.zeros((2, 3))
+        self._ear_buf = self._hist[EAR_ROW, :self.ear_history_size]
+        self._ear_state = self._hist_state[EAR_ROW]
+        self._baseline_buf = self._hist[BASELINE_ROW, :self.baseline_history_size]
+        self._baseline_state = self._hist_state[BASELINE_ROW]
         
         # Statistics
         self.total_blinks = 0
-        self.session_start_time = None
-        self.last_blink_time = None
+        self.session_start_time = None  # monotonic ms
+        self.last_blink_time = None  # monotonic ms
+        self._frame_time_ms = 0  # monotonic ms, read once per frame
+        
+        # Blinks waiting to be written to the database in one batch
+        self._blink_queue: list = []
+        self._blink_queue_max = 16
+        self._blink_queue_since = 0  # monotonic ms of the oldest queued blink
         self.session_id = None
         
         # Debug mode
@@ -76,6 +127,8 @@ class BlinkDetectorMediaPipe:
         self.is_paused = False
         self.is_detecting = False  # Track if detection is active
         
+        self._bind_blink_hooks()
+        
         self.logger.info("MediaPipe Blink Detector initialized (identical to web app)")
     
     def calculate_ear(self, eye_landmarks: np.ndarray) -> float:
@@ -89,6 +142,8 @@ class BlinkDetectorMediaPipe:
         Returns:
             Eye Aspect Ratio value
         """
+        eye_landmarks = np.asarray(eye_landmarks, dtype=np.float32)
+        
         # Vertical distances
         v1 = np.linalg.norm(eye_landmarks[1] - eye_landmarks[5])
         v2 = np.linalg.norm(eye_landmarks[2] - eye_landmarks[4])
@@ -103,6 +158,19 @@ class BlinkDetectorMediaPipe:
         ear = (v1 + v2) / (2.0 * h)
         return ear
     
+    def calculate_mean_ear(self, eye_points: np.ndarray) -> float:
+        """
+        Calculate the average EAR of both eyes in one pass
+        Same result as averaging calculate_ear over each eye
+        
+        Args:
+            eye_points: 12x2 array of left then right eye landmark points
+            
+        Returns:
+            Mean Eye Aspect Ratio of the two eyes
+        """
+        return float(mean_ear(eye_points))
+    
     def get_eye_landmarks(self, face_landmarks, image_shape) -> Tuple[np.ndarray, np.ndarray]:
         """
         Extract eye landmarks from face mesh
@@ -112,23 +180,25 @@ class BlinkDetectorMediaPipe:
             image_shape: Shape of the image (height, width)
             
         Returns:
-            Tuple of (left_eye_landmarks, right_eye_landmarks)
+            Tuple of (left_eye_landmarks, right_eye_landmarks). Both are views
+            into a buffer that is overwritten on the next call.
         """
         h, w = image_shape[:2]
         
-        # Extract left eye landmarks
-        left_eye = np.array([
-            [face_landmarks.landmark[i].x * w, face_landmarks.landmark[i].y * h]
-            for i in self.LEFT_EYE_INDICES
-        ])
+        # Gather both eyes' normalized points in a single pass. Indexing the
+        # 12 needed landmarks beats iterating all of them through protobuf.
+        landmarks = face_landmarks.landmark
+        buf = self._eye_buf
+        for k, i in self._eye_slots:
+            point = landmarks[i]
+            buf[k, 0] = point.x
+            buf[k, 1] = point.y
         
-        # Extract right eye landmarks
-        right_eye = np.array([
-            [face_landmarks.landmark[i].x * w, face_landmarks.landmark[i].y * h]
-            for i in self.RIGHT_EYE_INDICES
-        ])
+        # Scale to pixel coordinates
+        buf[:, 0] *= w
+        buf[:, 1] *= h
         
-        return left_eye, right_eye
+        return buf[:6], buf[6:]
     
     def update_baseline(self, ear: float):
         """
@@ -140,15 +210,8 @@ class BlinkDetectorMediaPipe:
         
         # Only update baseline when eyes are open
         if ear > self.EAR_THRESHOLD:
-            self.baseline_history.append(ear)
-            
-            # Keep only recent history
-            if len(self.baseline_history) > self.baseline_history_size:
-                self.baseline_history.pop(0)
-            
-            # Calculate baseline as average of history
-            if len(self.baseline_history) > 0:
-                self.baseline_ear = sum(self.baseline_history) / len(self.baseline_history)
+            # Baseline is the average of history
+            self.baseline_ear = float(ring_push(self._baseline_buf, self._baseline_state, ear))
     
     def get_adaptive_threshold(self) -> float:
         """
@@ -158,48 +221,78 @@ class BlinkDetectorMediaPipe:
         if not self.use_adaptive_threshold or self.baseline_ear == 0:
             return self.EAR_THRESHOLD
         
-        # Adaptive threshold is baseline minus drop threshold
-        drop_threshold = self.GLASSES_EAR_DROP if self.GLASSES_MODE else self.EAR_DROP_THRESHOLD
-        adaptive_threshold = self.baseline_ear - drop_threshold
-        
-        # Ensure threshold is reasonable
-        adaptive_threshold = max(0.15, min(0.30, adaptive_threshold))
-        
-        return adaptive_threshold
+        # Adaptive threshold is baseline minus drop threshold, kept within 0.15-0.30
+        return float(adaptive_threshold(self.baseline_ear, True, self.EAR_THRESHOLD, self._active_drop))
     
     def smooth_ear(self, ear: float) -> float:
         """
         Smooth EAR using moving average
         Same as web app
         """
-        self.ear_history.append(ear)
-        
-        # Keep only recent history
-        if len(self.ear_history) > self.ear_history_size:
-            self.ear_history.pop(0)
-        
         # Return average
-        return sum(self.ear_history) / len(self.ear_history)
+        return float(ring_push(self._ear_buf, self._ear_state, ear))
+    
+    def _get_input_target(self, shape) -> Optional[Tuple[int, int]]:
+        """Get the Face Mesh input size for a frame shape, or None if it already fits"""
+        key = (shape, self.input_size)
+        if key != self._input_shape:
+            h, w = shape[:2]
+            max_w, max_h = self.input_size
+            scale = min(max_w / w, max_h / h)
+            self._input_target = (int(w * scale), int(h * scale)) if scale < 1.0 else None
+            self._input_shape = key
+        return self._input_target
     
     def process_frame(self, frame: np.ndarray) -> bool:
         """
         Process a frame for blink detection
         Identical logic to web app
         
+        Runs synchronously on the caller's thread. The app calls it from its
+        detection thread while a separate capture thread reads the camera, so
+        inference already overlaps camera I/O.
+        
         Args:
             frame: BGR image from camera
             
         Returns:
             True if processing successful, False otherwise
         """
+        now_ms = self._now_ms()
+        # Write out queued blinks once the oldest has waited long enough,
+        # so the database-backed stats don't lag behind at low blink rates
+        if self._blink_queue and now_ms - self._blink_queue_since >= self.BLINK_FLUSH_MS:
+            self._flush_blinks()
+        
         if self.is_paused:
             return False
         
         if frame is None:
             return False
         
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self._frame_time_ms = now_ms
+        
+        # Skipped frame: carry the last EAR forward through the state machine
+        self._frame_tick += 1
+        if self._frame_tick % self.process_every_n != 0:
+            if self.eyes_closed or self._last_ear > 0:
+                self._update_blink_state(self._last_ear, self.get_adaptive_threshold())
+            return True
+        
+        # Shrink the frame Face Mesh has to scan
+        small = frame
+        target = self._get_input_target(frame.shape)
+        if target is not None:
+            small = cv2.resize(frame, target, interpolation=cv2.INTER_AREA)
+        
+        # Convert BGR to RGB for MediaPipe into a reused buffer
+        if self._rgb_buf is None or self._rgb_buf.shape != small.shape:
+            self._rgb_buf = np.empty_like(small)
+        rgb_frame = self._rgb_buf
+        rgb_frame.flags.writeable = True
+        cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+        # Read-only input lets MediaPipe wrap the array without copying it
+        rgb_frame.flags.writeable = False
         
         # Process with MediaPipe
         results = self.face_mesh.process(rgb_frame)
@@ -207,33 +300,33 @@ class BlinkDetectorMediaPipe:
         if not results.multi_face_landmarks:
             # No face detected
             self.current_ear = 0
+            self._last_ear = 0.0
             return False
         
         # Get first face
         face_landmarks = results.multi_face_landmarks[0]
         
-        # Extract eye landmarks
-        left_eye, right_eye = self.get_eye_landmarks(face_landmarks, frame.shape)
-        
-        # Calculate EAR for both eyes
-        left_ear = self.calculate_ear(left_eye)
-        right_ear = self.calculate_ear(right_eye)
+        # Extract eye landmarks into self._eye_buf (left eye, then right eye)
+        self.get_eye_landmarks(face_landmarks, frame.shape)
         
-        # Average EAR
-        ear = (left_ear + right_ear) / 2.0
-        
-        # Smooth EAR
-        ear = self.smooth_ear(ear)
+        # Mean EAR, smoothing, baseline and adaptive threshold in one kernel call
+        ear, baseline, threshold = ear_update(
+            self._eye_buf, self._hist, self._hist_state,
+            self.ear_history_size, self.baseline_history_size, self.baseline_ear,
+            self.use_adaptive_threshold, self.EAR_THRESHOLD, self._active_drop
+        )
+        ear = float(ear)
+        self.baseline_ear = float(baseline)
         self.current_ear = ear
+        self._last_ear = ear
         
-        # Update baseline
-        self.update_baseline(ear)
-        
-        # Get adaptive threshold
-        threshold = self.get_adaptive_threshold()
-        
+        self._update_blink_state(ear, threshold)
+        return True
+    
+    def _update_blink_state(self, ear: float, threshold: float):
+        """Advance the eyes open/closed state machine by one frame"""
         # Blink detection logic (same as web app)
-        current_time = time.time() * 1000  # Convert to ms
+        current_time = self._frame_time_ms
         
         if ear < threshold:
             # Eyes closed
@@ -258,13 +351,10 @@ class BlinkDetectorMediaPipe:
                     self.total_blinks += 1
                     self.last_blink_time = current_time
                     
-                    if self.debug_mode:
-                        self.logger.info(f"Blink detected! Duration: {blink_duration:.0f}ms, "
-                                       f"EAR: {ear:.3f}, Threshold: {threshold:.3f}")
+                    self._log_blink_hook(blink_duration, ear, threshold)
                     
                     # Save to database
-                    if self.db_manager and self.session_id:
-                        self._save_blink(ear, threshold)
+                    self._save_blink_hook(ear, threshold)
                     
                     # Callback
                     self._on_blink_detected()
@@ -275,19 +365,66 @@ class BlinkDetectorMediaPipe:
                 self.frame_counter = 0
             
             self.open_frame_counter += 1
-        
-        return True
+    
+    @classmethod
+    def _get_face_mesh(cls, refine_landmarks: bool):
+        """
+        Get the shared FaceMesh for these options, creating it on first use
+        Only one detector should process frames with it at a time.
+        """
+        key = (refine_landmarks,)
+        with cls._face_mesh_lock:
+            face_mesh = cls._face_meshes.get(key)
+            if face_mesh is None:
+                face_mesh = mp.solutions.face_mesh.FaceMesh(
+                    max_num_faces=1,
+                    refine_landmarks=refine_landmarks,
+                    min_detection_confidence=0.5,
+                    min_tracking_confidence=0.5
+                )
+                cls._face_meshes[key] = face_mesh
+            return face_mesh
+    
+    @classmethod
+    def shutdown_face_mesh(cls):
+        """Close the shared FaceMesh instances (call on application exit)"""
+        with cls._face_mesh_lock:
+            for face_mesh in cls._face_meshes.values():
+                face_mesh.close()
+            cls._face_meshes.clear()
+    
+    def _bind_blink_hooks(self):
+        """Bind the per-blink log and save hooks, no-ops when they are switched off"""
+        self._log_blink_hook = self._debug_log_blink if self.debug_mode else _noop
+        self._save_blink_hook = self._save_blink if self.db_manager else _noop
+    
+    def _debug_log_blink(self, blink_duration: float, ear: float, threshold: float):
+        """Log blink details in debug mode"""
+        self.logger.info(f"Blink detected! Duration: {blink_duration:.0f}ms, "
+                       f"EAR: {ear:.3f}, Threshold: {threshold:.3f}")
+    
+    @staticmethod
+    def _now_ms() -> int:
+        """Monotonic clock in integer milliseconds"""
+        return time.monotonic_ns() // 1_000_000
     
     def _save_blink(self, ear: float, threshold: float):
-        """Save blink to database"""
+        """Queue blink for the database, writing the queue once it is full"""
+        if not self._blink_queue:
+            self._blink_queue_since = self._frame_time_ms
+        self._blink_queue.append((datetime.now(), ear, self.session_id))
+        if len(self._blink_queue) >= self._blink_queue_max:
+            self._flush_blinks()
+    
+    def _flush_blinks(self):
+        """Write queued blinks to the database in one transaction"""
+        if not self._blink_queue or not self.db_manager:
+            return
         try:
-            self.db_manager.add_blink(
-                session_id=self.session_id,
-                ear_value=ear,
-                threshold=threshold
-            )
+            self.db_manager.add_blinks_batch(self._blink_queue)
         except Exception as e:
-            self.logger.error(f"Error saving blink: {e}")
+            self.logger.error(f"Error saving blinks: {e}")
+        self._blink_queue = []
     
     def _on_blink_detected(self):
         """Handle blink detection event"""
@@ -296,7 +433,11 @@ class BlinkDetectorMediaPipe:
     
     def start_detection(self, camera=None):
         """Start a new detection session"""
-        self.session_start_time = time.time()
+        # Drop face tracking carried over from the previous session
+        if hasattr(self.face_mesh, 'reset'):
+            self.face_mesh.reset()
+        
+        self.session_start_time = self._now_ms()
         self.blink_counter = 0
         self.total_blinks = 0
         self.is_detecting = True
@@ -312,6 +453,7 @@ class BlinkDetectorMediaPipe:
     def stop(self):
         """Stop detection and end session"""
         self.is_detecting = False
+        self._flush_blinks()
         
         if self.session_id and self.db_manager:
             try:
@@ -345,7 +487,7 @@ class BlinkDetectorMediaPipe:
         blinks_per_minute = 0
         
         if self.session_start_time:
-            duration = int(time.time() - self.session_start_time)
+            duration = (self._now_ms() - self.session_start_time) // 1000
             if duration > 0:
                 blinks_per_minute = (self.blink_counter / duration) * 60
         
@@ -374,11 +516,13 @@ class BlinkDetectorMediaPipe:
     def set_glasses_mode(self, enabled: bool):
         """Enable/disable glasses mode"""
         self.GLASSES_MODE = enabled
+        self._active_drop = self.GLASSES_EAR_DROP if enabled else self.EAR_DROP_THRESHOLD
         self.logger.info(f"Glasses mode: {'enabled' if enabled else 'disabled'}")
     
     def set_debug_mode(self, enabled: bool):
         """Enable/disable debug mode"""
         self.debug_mode = enabled
+        self._bind_blink_hooks()
         self.logger.info(f"Debug mode: {'enabled' if enabled else 'disabled'}")
     
     def set_adaptive_threshold(self, enabled: bool):
@@ -387,6 +531,5 @@ class BlinkDetectorMediaPipe:
         self.logger.info(f"Adaptive threshold: {'enabled' if enabled else 'disabled'}")
     
     def __del__(self):
-        """Cleanup"""
-        if hasattr(self, 'face_mesh'):
-            self.face_mesh.close()
+        """Cleanup (the shared FaceMesh is closed by shutdown_face_mesh)"""
+        self.face_mesh = None
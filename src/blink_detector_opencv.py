@@ -6,12 +6,39 @@ This version uses OpenCV's eye detection for blink tracking
 import cv2
 import numpy as np
 import logging
+import time
+from pathlib import Path
 from typing import Optional, Dict
 from datetime import datetime
 
+# Optional YuNet face model; the Haar face cascade is used when it is missing
+YUNET_MODEL = Path(__file__).parent / 'models' / 'face_detection_yunet_2023mar.onnx'
+
+# Optional LBP face cascade (from OpenCV's data/lbpcascades, which the pip
+# wheels don't ship); integer features, faster than the Haar cascade
+LBP_FACE_CASCADE = Path(__file__).parent / 'models' / 'lbpcascade_frontalface_improved.xml'
+
 class BlinkDetectorOpenCV:
     """Eye blink detection using OpenCV's Haar Cascades only"""
     
+    # YuNet input width; height follows the frame's aspect ratio
+    FACE_INPUT_WIDTH = 160
+    
+    # A found face is reused for this many frames before detecting it again;
+    # eyes are still detected every frame
+    FACE_REDETECT_INTERVAL = 3
+    
+    # Live statistics are plain attributes, assembled into a dict by get_stats
+    __slots__ = (
+        'logger', 'db_manager', 'BLINK_THRESHOLD', 'CONSECUTIVE_FRAMES',
+        'frames_without_eyes', 'frames_with_eyes', 'total_blinks',
+        'session_start_time', '_session_start_ms', 'last_blink_time',
+        'is_detecting', 'is_paused', 'face_cascade', 'eye_cascade', 'face_detector',
+        '_face_input_size', '_umat_shape', '_gray_buf', 'camera',
+        'eyes_detected', 'session_blinks', 'blinks_per_minute', 'session_duration',
+        'last_blink_time_iso', 'last_gray', 'last_faces', 'last_eyes', '_face_reuse_left'
+    )
+    
     def __init__(self, db_manager, blink_threshold=3, consecutive_frames=2):
         self.logger = logging.getLogger(__name__)
         self.db_manager = db_manager
@@ -25,8 +52,8 @@ class BlinkDetectorOpenCV:
         self.frames_with_eyes = 0
         self.total_blinks = 0
         self.session_start_time = None
+        self._session_start_ms = 0  # monotonic ms, for per-frame durations
         self.last_blink_time = None
-        self.prev_eye_detected = True
         
         # Control state
         self.is_detecting = False
@@ -35,24 +62,40 @@ class BlinkDetectorOpenCV:
         # Initialize OpenCV detectors
         self.face_cascade = None
         self.eye_cascade = None
+        self.face_detector = None
+        self._face_input_size = None
+        self._umat_shape = None
         self._initialize_models()
+        self._gray_buf = None  # reused grayscale frame
+        
+        # Last detection results, for callers that draw them: grayscale frame,
+        # face boxes and eye boxes (relative to the face's upper half)
+        self.last_gray = None
+        self.last_faces = ()
+        self.last_eyes = ()
+        self._face_reuse_left = 0  # frames the cached face is still reused for
         
         # Statistics
-        self.stats = {
-            'total_blinks': 0,
-            'session_blinks': 0,
-            'blinks_per_minute': 0,
-            'session_duration': 0,
-            'last_blink_time': None,
-            'eyes_detected': False
-        }
+        self.session_blinks = 0
+        self.blinks_per_minute = 0
+        self.session_duration = 0
+        self.last_blink_time_iso = None
+        self.eyes_detected = False
     
     def _initialize_models(self):
         """Initialize OpenCV Haar Cascade detectors"""
         try:
-            # Load face detector
-            face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(face_cascade_path)
+            # Load face detector, the LBP cascade when it is available
+            if LBP_FACE_CASCADE.exists():
+                self.face_cascade = cv2.CascadeClassifier(str(LBP_FACE_CASCADE))
+                if self.face_cascade.empty():
+                    self.logger.warning("Could not load LBP face cascade, using Haar cascade")
+                else:
+                    self.logger.info("Using LBP face cascade")
+            
+            if self.face_cascade is None or self.face_cascade.empty():
+                face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                self.face_cascade = cv2.CascadeClassifier(face_cascade_path)
             
             if self.face_cascade.empty():
                 raise Exception("Could not load face cascade")
@@ -64,41 +107,67 @@ class BlinkDetectorOpenCV:
             if self.eye_cascade.empty():
                 raise Exception("Could not load eye cascade")
             
+            # Prefer the YuNet CNN face detector when the model is available
+            if hasattr(cv2, 'FaceDetectorYN') and YUNET_MODEL.exists():
+                try:
+                    self._face_input_size = (self.FACE_INPUT_WIDTH, self.FACE_INPUT_WIDTH * 3 // 4)
+                    self.face_detector = cv2.FaceDetectorYN.create(
+                        str(YUNET_MODEL), "", self._face_input_size, score_threshold=0.6
+                    )
+                    self.logger.info("Using YuNet face detector")
+                except Exception as e:
+                    self.face_detector = None
+                    self.logger.warning(f"Could not load YuNet face detector, using Haar cascade: {e}")
+            
             self.logger.info("OpenCV detectors initialized successfully")
             
         except Exception as e:
             self.logger.error(f"Error initializing OpenCV detectors: {e}")
             raise
     
-    def detect_eyes(self, frame):
-        """Detect eyes in the frame using OpenCV"""
+    def detect_eyes(self, frame, gray=None):
+        """Detect eyes in the frame using OpenCV (accepts ndarray or cv2.UMat)
+        
+        Args:
+            frame: BGR frame, ignored when gray is given
+            gray: Optional precomputed grayscale frame
+        """
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # Convert to grayscale unless the caller already did
+            if gray is None:
+                if isinstance(frame, np.ndarray):
+                    if self._gray_buf is None or self._gray_buf.shape != frame.shape[:2]:
+                        self._gray_buf = np.empty(frame.shape[:2], dtype=np.uint8)
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+                else:
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
-            # Detect faces
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(50, 50),
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
-            
-            if len(faces) == 0:
+            self.last_gray = gray
+            reused = self._face_reuse_left > 0 and bool(self.last_faces)
+            if reused:
+                # Faces barely move between frames; keep the cached box
+                face = self.last_faces[0]
+                self._face_reuse_left -= 1
+            else:
+                face = self._detect_face(gray)
+                self._face_reuse_left = self.FACE_REDETECT_INTERVAL - 1
+            if face is None:
+                self.last_faces = self.last_eyes = ()
                 return False, 0
             
-            # Use the first detected face
-            (x, y, w, h) = faces[0]
-            roi_gray = gray[y:y+h, x:x+w]
+            eyes = self._detect_eyes_in_face(gray, face)
+            if reused and len(eyes) == 0:
+                # The face may have moved off the cached box; look again
+                # before counting the frame as closed eyes
+                face = self._detect_face(gray)
+                self._face_reuse_left = self.FACE_REDETECT_INTERVAL - 1
+                if face is None:
+                    self.last_faces = self.last_eyes = ()
+                    return False, 0
+                eyes = self._detect_eyes_in_face(gray, face)
             
-            # Detect eyes in the face region
-            eyes = self.eye_cascade.detectMultiScale(
-                roi_gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(20, 20)
-            )
+            self.last_faces = (face,)
+            self.last_eyes = eyes
             
             num_eyes = len(eyes)
             
@@ -108,17 +177,93 @@ class BlinkDetectorOpenCV:
             return eyes_detected, num_eyes
             
         except Exception as e:
-            self.logger.debug(f"Error detecting eyes: {e}")
+            self.logger.debug("Error detecting eyes: %s", e)
             return False, 0
     
-    def process_frame(self, frame=None) -> bool:
-        """Process a single frame for blink detection"""
+    def _detect_eyes_in_face(self, gray, face):
+        """Eye boxes within the upper half of a face, relative to that half"""
+        # Eyes are in the upper half of the face
+        (x, y, w, h) = face
+        if isinstance(gray, cv2.UMat):
+            # UMat has no slicing, take a region-of-interest view instead
+            roi_gray = cv2.UMat(gray, (y, y+h//2), (x, x+w))
+        else:
+            roi_gray = gray[y:y+h//2, x:x+w]
+        
+        # Detect eyes in the face region; an eye is at most half the face
+        # wide, so larger windows are never scanned
+        return self.eye_cascade.detectMultiScale(
+            roi_gray,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(20, 20),
+            maxSize=(max(20, w // 2), max(20, h // 2)),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+    
+    def _detect_face(self, gray):
+        """Find the first face in a grayscale frame
+        
+        Returns:
+            (x, y, w, h) of the face, or None if no face was found
+        """
+        if self.face_detector is not None:
+            # YuNet on a small 3-channel copy, box scaled back to the frame
+            if isinstance(gray, cv2.UMat):
+                # UMat has no shape; read it back once, the capture size is fixed
+                if self._umat_shape is None:
+                    self._umat_shape = gray.get().shape[:2]
+                frame_h, frame_w = self._umat_shape
+            else:
+                frame_h, frame_w = gray.shape[:2]
+            input_size = (self.FACE_INPUT_WIDTH, max(1, self.FACE_INPUT_WIDTH * frame_h // frame_w))
+            if input_size != self._face_input_size:
+                self.face_detector.setInputSize(input_size)
+                self._face_input_size = input_size
+            
+            small = cv2.resize(gray, input_size, interpolation=cv2.INTER_AREA)
+            small = cv2.cvtColor(small, cv2.COLOR_GRAY2BGR)
+            if isinstance(small, cv2.UMat):
+                # YuNet returns UMat results for UMat input, which have no
+                # len() or indexing; hand it the small host copy instead
+                small = small.get()
+            _, faces = self.face_detector.detect(small)
+            if faces is None or len(faces) == 0:
+                return None
+            
+            scale = frame_w / input_size[0]
+            x, y, w, h = (faces[0][:4] * scale).astype(int)
+            x, y = max(0, x), max(0, y)
+            return x, y, min(w, frame_w - x), min(h, frame_h - y)
+        
+        # Face cascade on a half-size frame (a quarter of the windows); a
+        # coarse pyramid over webcam-range face sizes, box scaled back up
+        small = cv2.resize(gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+        faces = self.face_cascade.detectMultiScale(
+            small,
+            scaleFactor=1.3,
+            minNeighbors=4,
+            minSize=(50, 50),
+            maxSize=(200, 200),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        if len(faces) == 0:
+            return None
+        return tuple(int(v) * 2 for v in faces[0])
+    
+    def process_frame(self, frame=None, gray=None) -> bool:
+        """Process a single frame for blink detection
+        
+        Args:
+            frame: BGR frame; captured from the camera if neither frame nor gray is given
+            gray: Optional precomputed grayscale frame, saves a color conversion
+        """
         if self.is_paused or not self.is_detecting:
             return True
             
         try:
             # If no frame provided, capture from camera
-            if frame is None:
+            if frame is None and gray is None:
                 if not hasattr(self, 'camera') or self.camera is None:
                     return False
                     
@@ -127,17 +272,12 @@ class BlinkDetectorOpenCV:
                     return False
             
             # Detect eyes
-            eyes_detected, num_eyes = self.detect_eyes(frame)
+            eyes_detected, num_eyes = self.detect_eyes(frame, gray)
             
             # Update statistics
-            self.stats['eyes_detected'] = eyes_detected
+            self.eyes_detected = eyes_detected
             
             # Blink detection logic
-            if not eyes_detected and self.prev_eye_detected:
-                # Eyes just closed
-                self.frames_without_eyes = 0
-                self.frames_with_eyes = 0
-            
             if not eyes_detected:
                 # Eyes are closed
                 self.frames_without_eyes += 1
@@ -150,8 +290,6 @@ class BlinkDetectorOpenCV:
                 self.frames_without_eyes = 0
                 self.frames_with_eyes += 1
             
-            self.prev_eye_detected = eyes_detected
-            
             # Update session statistics
             self._update_session_stats()
             
@@ -165,12 +303,11 @@ class BlinkDetectorOpenCV:
         """Register a detected blink"""
         try:
             self.total_blinks += 1
-            self.stats['session_blinks'] += 1
-            self.stats['total_blinks'] = self.total_blinks
+            self.session_blinks += 1
             
             current_time = datetime.now()
             self.last_blink_time = current_time
-            self.stats['last_blink_time'] = current_time.isoformat()
+            self.last_blink_time_iso = current_time.isoformat()
             
             # Save blink to database
             self.db_manager.record_blink(current_time)
@@ -184,15 +321,15 @@ class BlinkDetectorOpenCV:
         """Update session statistics"""
         try:
             if self.session_start_time:
-                session_duration = (datetime.now() - self.session_start_time).total_seconds()
-                self.stats['session_duration'] = session_duration
+                session_duration = (time.monotonic_ns() // 1_000_000 - self._session_start_ms) / 1000
+                self.session_duration = session_duration
                 
                 # Calculate blinks per minute
                 if session_duration > 0:
-                    self.stats['blinks_per_minute'] = (self.stats['session_blinks'] * 60) / session_duration
+                    self.blinks_per_minute = (self.session_blinks * 60) / session_duration
                     
         except Exception as e:
-            self.logger.debug(f"Error updating session stats: {e}")
+            self.logger.debug("Error updating session stats: %s", e)
     
     def start_detection(self, camera):
         """Start blink detection with the given camera"""
@@ -201,14 +338,15 @@ class BlinkDetectorOpenCV:
             self.is_detecting = True
             self.is_paused = False
             self.session_start_time = datetime.now()
-            self.stats['session_blinks'] = 0
+            self._session_start_ms = time.monotonic_ns() // 1_000_000
+            self._umat_shape = None
+            self._face_reuse_left = 0
+            self.session_blinks = 0
             self.frames_without_eyes = 0
             self.frames_with_eyes = 0
-            self.prev_eye_detected = True
             
             # Load total blinks from database
             self.total_blinks = self.db_manager.get_total_blinks()
-            self.stats['total_blinks'] = self.total_blinks
             
             self.logger.info("Blink detection started (OpenCV mode)")
             
@@ -227,8 +365,8 @@ class BlinkDetectorOpenCV:
             session_data = {
                 'start_time': self.session_start_time,
                 'end_time': datetime.now(),
-                'total_blinks': self.stats['session_blinks'],
-                'duration': self.stats['session_duration']
+                'total_blinks': self.session_blinks,
+                'duration': self.session_duration
             }
             self.db_manager.save_session(session_data)
         
@@ -250,14 +388,22 @@ class BlinkDetectorOpenCV:
     
     def get_stats(self) -> Dict:
         """Get current detection statistics"""
-        return self.stats.copy()
+        return {
+            'total_blinks': self.total_blinks,
+            'session_blinks': self.session_blinks,
+            'blinks_per_minute': self.blinks_per_minute,
+            'session_duration': self.session_duration,
+            'last_blink_time': self.last_blink_time_iso,
+            'eyes_detected': self.eyes_detected
+        }
     
     def reset_session_stats(self):
         """Reset session statistics"""
-        self.stats['session_blinks'] = 0
-        self.stats['session_duration'] = 0
-        self.stats['blinks_per_minute'] = 0
+        self.session_blinks = 0
+        self.session_duration = 0
+        self.blinks_per_minute = 0
         self.session_start_time = datetime.now()
+        self._session_start_ms = time.monotonic_ns() // 1_000_000
         self.logger.info("Session statistics reset")
     
     def set_blink_threshold(self, threshold: int):
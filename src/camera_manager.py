@@ -3,66 +3,199 @@ Camera Manager for handling camera detection, selection, and access
 """
 
 import cv2
+import glob
 import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Tuple
 
+# Native capture backend for this platform. Without one OpenCV walks its whole
+# backend fallback chain on every open, which can take seconds.
+if sys.platform.startswith('win'):
+    _PREFERRED_BACKEND = cv2.CAP_DSHOW
+elif sys.platform.startswith('linux'):
+    _PREFERRED_BACKEND = cv2.CAP_V4L2
+elif sys.platform == 'darwin':
+    _PREFERRED_BACKEND = cv2.CAP_AVFOUNDATION
+else:
+    _PREFERRED_BACKEND = cv2.CAP_ANY
+
+# The pipeline already runs capture and detection on their own pinned threads.
+# OpenCV's worker pool would inherit that single-core affinity and only contend
+# with them, so OpenCV calls run on the calling thread.
+cv2.setNumThreads(1)
+
+# Optional device enumeration, so probing only opens cameras that exist.
+# Linux lists /dev/video* directly; without these the scan tries indices 0-9.
+try:
+    if sys.platform.startswith('win'):
+        from pygrabber.dshow_graph import FilterGraph
+    elif sys.platform == 'darwin':
+        import AVFoundation
+    DEVICE_ENUM_AVAILABLE = True
+except ImportError:
+    DEVICE_ENUM_AVAILABLE = False
+
 class CameraManager:
     """Manages camera detection, selection, and access for the application"""
     
+    # Longest a caller waits on the startup camera scan
+    SCAN_TIMEOUT = 30.0  # seconds
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.active_camera = None
         self.active_camera_index = None
         self.available_cameras = []
-        self._refresh_cameras()
+        self._cameras_by_index: Dict[int, Dict] = {}
+        
+        # Geometry per camera index (width, height, fps); fixed while a capture
+        # keeps its configuration, so it is read from the driver only once
+        self._props_cache: Dict[int, Dict] = {}
+        
+        # Background grabber behind capture_frame, holding only the newest frame.
+        # Frames are triple-buffered: the grabber reads into a back buffer and
+        # publishes it as the front one; capture_frame swaps the front buffer
+        # for the one its caller last had. No buffer is reallocated per frame.
+        self._grab_thread = None
+        self._grab_running = False
+        self._frame_lock = threading.Lock()
+        self._latest = None  # (ret, monotonic time) of the newest read
+        self._front = None  # newest frame, not yet handed out
+        self._reader = None  # frame last returned by capture_frame
+        self._fresh = False  # front holds a frame the caller hasn't had
+        self._first_frame = threading.Event()
+        
+        # Scan in the background so startup doesn't wait on camera drivers;
+        # methods that need the camera list wait for it to finish
+        self._scan_thread = threading.Thread(target=self._refresh_cameras,
+                                             name="camera-scan", daemon=True)
+        self._scan_thread.start()
     
     def _refresh_cameras(self):
         """Scan for available cameras in the system"""
-        self.available_cameras = []
         self.logger.info("Scanning for available cameras...")
         
-        # Test camera indices 0-10 (most systems won't have more than this)
-        for index in range(10):
-            try:
-                cap = cv2.VideoCapture(index)
-                if cap.isOpened():
-                    # Try to read a frame to verify camera is working
-                    ret, frame = cap.read()
-                    if ret and frame is not None:
-                        # Get camera properties
-                        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                        fps = int(cap.get(cv2.CAP_PROP_FPS))
-                        
-                        camera_info = {
-                            'index': index,
-                            'name': f"Camera {index}",
-                            'resolution': f"{width}x{height}",
-                            'fps': fps,
-                            'is_available': True
-                        }
-                        
-                        # Try to get more detailed information on Windows
-                        try:
-                            backend = cap.getBackendName()
-                            camera_info['backend'] = backend
-                        except:
-                            camera_info['backend'] = "Unknown"
-                        
-                        self.available_cameras.append(camera_info)
-                        self.logger.info(f"Found camera {index}: {width}x{height} @ {fps}fps")
-                        
-                cap.release()
-                
-            except Exception as e:
-                self.logger.debug(f"Camera {index} not available: {e}")
-                continue
+        # Probe the devices the platform reports, or else indices 0-10 (most
+        # systems won't have more than this). Opening a device mostly waits on
+        # the driver with the GIL released, so probing every index at once
+        # takes about as long as the slowest.
+        devices = self._enumerate_devices()
+        if devices is None:
+            devices = [(index, None) for index in range(10)]
+        if not devices:
+            self.available_cameras = []
+            self._cameras_by_index = {}
+            self.logger.info("Found 0 available cameras")
+            return self.available_cameras
+        
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            results = list(executor.map(lambda device: self._probe_camera(*device), devices))
+        
+        # map() keeps index order
+        self.available_cameras = [info for info in results if info is not None]
+        self._cameras_by_index = {cam['index']: cam for cam in self.available_cameras}
         
         self.logger.info(f"Found {len(self.available_cameras)} available cameras")
         return self.available_cameras
     
+    def _enumerate_devices(self) -> Optional[List[Tuple[int, Optional[str]]]]:
+        """List (index, name) of the video devices the platform reports
+        
+        Returns:
+            Devices in index order, or None if the platform can't be asked
+        """
+        try:
+            if sys.platform.startswith('linux'):
+                indices = set()
+                for path in glob.glob('/dev/video*'):
+                    match = re.fullmatch(r'/dev/video(\d+)', path)
+                    if match:
+                        indices.add(int(match.group(1)))
+                return [(index, None) for index in sorted(indices)]
+            
+            if not DEVICE_ENUM_AVAILABLE:
+                return None
+            
+            if sys.platform.startswith('win'):
+                # DirectShow lists devices in the order OpenCV indexes them
+                names = FilterGraph().get_input_devices()
+                return list(enumerate(names))
+            
+            if sys.platform == 'darwin':
+                # Device order is not guaranteed to match OpenCV's, so only the count is used
+                devices = AVFoundation.AVCaptureDevice.devicesWithMediaType_(AVFoundation.AVMediaTypeVideo)
+                return [(index, None) for index in range(len(devices))]
+            
+        except Exception as e:
+            self.logger.debug(f"Device enumeration failed, scanning indices: {e}")
+        
+        return None
+    
+    def _probe_camera(self, index: int, name: Optional[str] = None) -> Optional[Dict]:
+        """Open a camera index and describe it, or return None if it is not usable"""
+        try:
+            cap = cv2.VideoCapture(index, _PREFERRED_BACKEND)
+            try:
+                if not cap.isOpened():
+                    return None
+                
+                # Grab a frame to verify camera is working; no need to decode it
+                if not cap.grab():
+                    return None
+                
+                # Get camera properties
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                if not width or not height:
+                    # Some backends only report geometry after a decoded frame
+                    ret, frame = cap.read()
+                    if not ret or frame is None:
+                        return None
+                    height, width = frame.shape[:2]
+                fps = int(cap.get(cv2.CAP_PROP_FPS))
+                if index != self.active_camera_index:
+                    self._props_cache[index] = {'width': width, 'height': height, 'fps': fps}
+                
+                camera_info = {
+                    'index': index,
+                    'name': name or f"Camera {index}",
+                    'resolution': f"{width}x{height}",
+                    'fps': fps,
+                    'is_available': True
+                }
+                
+                # Try to get more detailed information on Windows
+                try:
+                    backend = cap.getBackendName()
+                    camera_info['backend'] = backend
+                except:
+                    camera_info['backend'] = "Unknown"
+                
+                self.logger.info(f"Found camera {index}: {width}x{height} @ {fps}fps")
+                return camera_info
+            finally:
+                cap.release()
+            
+        except Exception as e:
+            self.logger.debug(f"Camera {index} not available: {e}")
+            return None
+    
+    def is_scanning(self) -> bool:
+        """Check if the startup camera scan is still running"""
+        return self._scan_thread.is_alive()
+    
+    def _wait_for_scan(self):
+        """Block until the startup camera scan finishes (up to SCAN_TIMEOUT)"""
+        if self._scan_thread.is_alive():
+            self._scan_thread.join(self.SCAN_TIMEOUT)
+    
     def get_available_cameras(self) -> List[Dict]:
         """Get list of available cameras with their properties"""
+        self._wait_for_scan()
         return self.available_cameras.copy()
     
     def select_camera(self, camera_index: int) -> bool:
@@ -73,13 +206,13 @@ class CameraManager:
                 self.release_camera()
             
             # Check if camera index is valid
-            available_indices = [cam['index'] for cam in self.available_cameras]
-            if camera_index not in available_indices:
+            self._wait_for_scan()
+            if camera_index not in self._cameras_by_index:
                 self.logger.error(f"Camera index {camera_index} not available")
                 return False
             
             # Try to open the camera
-            cap = cv2.VideoCapture(camera_index)
+            cap = cv2.VideoCapture(camera_index, _PREFERRED_BACKEND)
             if not cap.isOpened():
                 self.logger.error(f"Failed to open camera {camera_index}")
                 return False
@@ -91,7 +224,9 @@ class CameraManager:
                 cap.release()
                 return False
             
-            # Configure camera for optimal performance
+            # Configure camera for optimal performance. MJPG first: many
+            # webcams cap uncompressed YUYV at a low frame rate.
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
             cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
             cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             cap.set(cv2.CAP_PROP_FPS, 30)
@@ -99,6 +234,17 @@ class CameraManager:
             # Set buffer size to reduce latency
             cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
+            # Drop frames the driver buffered while opening: those grab at once,
+            # a live frame takes about a frame interval
+            for _ in range(30):
+                start = time.monotonic()
+                cap.grab()
+                if time.monotonic() - start > 0.005:
+                    break
+            
+            # Geometry as configured, not as probed
+            self._props_cache[camera_index] = self._read_static_properties(cap)
+            
             self.active_camera = cap
             self.active_camera_index = camera_index
             
@@ -110,22 +256,24 @@ class CameraManager:
             return False
     
     def get_active_camera(self) -> Optional[cv2.VideoCapture]:
-        """Get the currently active camera object"""
+        """Get the currently active camera object
+        
+        Callers that read it directly must not also use capture_frame, whose
+        grabber thread reads the same capture.
+        """
         return self.active_camera
     
     def get_active_camera_info(self) -> Optional[Dict]:
         """Get information about the currently active camera"""
         if self.active_camera_index is None:
             return None
-            
-        for cam in self.available_cameras:
-            if cam['index'] == self.active_camera_index:
-                return cam.copy()
         
-        return None
+        cam = self._cameras_by_index.get(self.active_camera_index)
+        return cam.copy() if cam is not None else None
     
     def is_camera_available(self) -> bool:
         """Check if any camera is available"""
+        self._wait_for_scan()
         return len(self.available_cameras) > 0
     
     def is_camera_active(self) -> bool:
@@ -134,7 +282,10 @@ class CameraManager:
     
     def release_camera(self):
         """Release the currently active camera"""
+        self._stop_grabber()
+        
         if self.active_camera:
+            self._props_cache.pop(self.active_camera_index, None)
             try:
                 self.active_camera.release()
                 self.logger.info(f"Camera {self.active_camera_index} released")
@@ -145,16 +296,80 @@ class CameraManager:
                 self.active_camera_index = None
     
     def capture_frame(self) -> Optional[Tuple[bool, any]]:
-        """Capture a frame from the active camera"""
-        if not self.is_camera_active():
+        """Get the newest frame from the active camera
+        
+        The first call starts a grabber thread that keeps reading the camera,
+        so this returns at once instead of waiting on the driver. The returned
+        frame is a reused buffer, valid until the next call; copy it to keep it.
+        """
+        # isOpened() was checked when the camera was selected; read errors
+        # surface through the grabber as ret=False
+        if self.active_camera is None:
             return None
-            
-        try:
-            ret, frame = self.active_camera.read()
-            return (ret, frame) if ret else None
-        except Exception as e:
-            self.logger.error(f"Error capturing frame: {e}")
+        
+        if self._grab_thread is None:
+            self._start_grabber()
+        
+        # Don't race the first read after startup (is_set() skips the
+        # Event's condition lock once frames are flowing)
+        if not self._first_frame.is_set() and not self._first_frame.wait(timeout=1.0):
             return None
+        
+        with self._frame_lock:
+            if self._fresh:
+                self._reader, self._front = self._front, self._reader
+                self._fresh = False
+            ret, _ = self._latest
+            frame = self._reader
+        return (ret, frame) if ret else None
+    
+    def _start_grabber(self):
+        """Start the thread that keeps the newest frame for capture_frame"""
+        self._latest = None
+        self._front = self._reader = None
+        self._fresh = False
+        self._first_frame.clear()
+        self._grab_running = True
+        self._grab_thread = threading.Thread(
+            target=self._grab_loop, args=(self.active_camera,), daemon=True
+        )
+        self._grab_thread.start()
+    
+    def _stop_grabber(self):
+        """Stop the grabber thread before its camera is released"""
+        if self._grab_thread is None:
+            return
+        self._grab_running = False
+        self._grab_thread.join(timeout=2.0)
+        self._grab_thread = None
+        self._latest = None
+        self._front = self._reader = None
+        self._fresh = False
+        self._first_frame.clear()
+    
+    def _grab_loop(self, cap: cv2.VideoCapture):
+        """Read frames continuously, keeping only the newest"""
+        back = None
+        while self._grab_running:
+            try:
+                # Decode into the back buffer; OpenCV allocates it on the first
+                # read or if the frame size changes
+                ret, frame = cap.read(back) if back is not None else cap.read()
+            except Exception as e:
+                self.logger.error(f"Error capturing frame: {e}")
+                ret, frame = False, None
+            
+            with self._frame_lock:
+                if ret and frame is not None:
+                    # Publish it, and write the next frame over the unclaimed old front
+                    back, self._front = self._front, frame
+                    self._fresh = True
+                self._latest = (ret, time.monotonic())
+            self._first_frame.set()
+            
+            if not ret:
+                # Don't spin on a camera that stopped delivering
+                time.sleep(0.01)
     
     def get_camera_properties(self, camera_index: int = None) -> Dict:
         """Get detailed properties of a camera"""
@@ -164,14 +379,17 @@ class CameraManager:
             return {}
         
         try:
-            cap = cv2.VideoCapture(index) if camera_index is not None else self.active_camera
+            cap = cv2.VideoCapture(index, _PREFERRED_BACKEND) if camera_index is not None else self.active_camera
             if not cap.isOpened():
                 return {}
             
+            static = self._props_cache.get(index)
+            if static is None:
+                static = self._props_cache[index] = self._read_static_properties(cap)
+            
+            # Only the image controls can change under an open capture
             properties = {
-                'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-                'fps': int(cap.get(cv2.CAP_PROP_FPS)),
+                **static,
                 'brightness': cap.get(cv2.CAP_PROP_BRIGHTNESS),
                 'contrast': cap.get(cv2.CAP_PROP_CONTRAST),
                 'saturation': cap.get(cv2.CAP_PROP_SATURATION),
@@ -189,8 +407,18 @@ class CameraManager:
             self.logger.error(f"Error getting camera properties: {e}")
             return {}
     
+    @staticmethod
+    def _read_static_properties(cap: cv2.VideoCapture) -> Dict:
+        """Read the geometry properties that stay fixed for a configured capture"""
+        return {
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': int(cap.get(cv2.CAP_PROP_FPS)),
+        }
+    
     def auto_select_best_camera(self) -> bool:
         """Automatically select the best available camera"""
+        self._wait_for_scan()
         if not self.available_cameras:
             self.logger.warning("No cameras available for auto-selection")
             return False
@@ -202,5 +430,6 @@ class CameraManager:
     
     def refresh_and_get_cameras(self) -> List[Dict]:
         """Refresh camera list and return updated list"""
+        self._wait_for_scan()
         self._refresh_cameras()
         return self.get_available_cameras()
@@ -4,13 +4,44 @@ Database Manager for storing blink tracking data
 
 import sqlite3
 import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from pathlib import Path
 
+# Hot-path statements, kept as constants so every call passes identical text
+# and hits the connection's prepared statement cache
+_SQL_INSERT_BLINK = '''
+    INSERT INTO blinks (timestamp, ear_value, session_id)
+    VALUES (?, ?, ?)
+'''
+_SQL_COUNT_BLINKS = 'SELECT COUNT(*) FROM blinks'
+_SQL_GET_SETTING = 'SELECT value FROM settings WHERE key = ?'
+# Upsert updates the row in place; INSERT OR REPLACE would delete and reinsert it
+_SQL_SET_SETTING = '''
+    INSERT INTO settings (key, value, updated_at)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP
+'''
+
 class DatabaseManager:
     """Manages SQLite database for storing blink tracking data"""
     
+    # PRAGMA user_version; 1 = blink timestamps stored as integer epoch seconds
+    SCHEMA_VERSION = 1
+    
+    # Blink writer batching: commit after this many rows or this long
+    WRITE_BATCH_MAX = 256
+    WRITE_BATCH_WAIT = 0.1  # seconds
+    _WRITER_STOP = object()
+    
+    # How long a statistics summary is reused before the next query
+    STATS_CACHE_TTL = 1.0  # seconds
+    
     def __init__(self, db_path: str = "data/blink_tracker.db"):
         self.logger = logging.getLogger(__name__)
         self.db_path = Path(db_path)
@@ -19,14 +50,37 @@ class DatabaseManager:
         self.db_path.parent.mkdir(exist_ok=True)
         
         self.connection = None
+        # One connection is shared across threads; writers take turns
+        self._write_lock = threading.Lock()
+        self._settings_batch = threading.local()  # pending settings per thread
+        
+        # Last statistics summary; cleared by every blink or session write
+        self._stats_cache = None
+        self._stats_cache_time = 0.0
         self._initialize_database()
+        
+        # Blink inserts are queued and committed in batches by a writer thread
+        self._write_queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer.start()
     
     def _initialize_database(self):
         """Initialize database connection and create tables"""
         try:
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False,
+                                              cached_statements=512)
             self.connection.row_factory = sqlite3.Row  # Enable column access by name
             
+            # WAL appends commits instead of rewriting a rollback journal, and
+            # NORMAL sync drops the per-commit fsync (safe under WAL)
+            cursor = self.connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+            cursor.execute('PRAGMA mmap_size=268435456')
+            cursor.execute('PRAGMA cache_size=-65536')
+            cursor.execute('PRAGMA busy_timeout=5000')
+            
             self._create_tables()
             self.logger.info(f"Database initialized: {self.db_path}")
             
@@ -79,32 +133,104 @@ class DatabaseManager:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions(start_time)')
             
             self.connection.commit()
+            self._migrate_schema()
             self.logger.info("Database tables created/verified")
             
         except Exception as e:
             self.logger.error(f"Error creating tables: {e}")
             raise
     
+    def _migrate_schema(self):
+        """Bring an older database up to SCHEMA_VERSION"""
+        cursor = self.connection.cursor()
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        
+        # v1: ISO timestamp strings (local time) become integer epoch seconds.
+        # The column's NUMERIC affinity keeps integers as integers, so no
+        # ALTER TABLE is needed; 'utc' converts the local time before '%s'
+        cursor.execute('''
+            UPDATE blinks
+            SET timestamp = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+            WHERE typeof(timestamp) = 'text'
+        ''')
+        cursor.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+        self.connection.commit()
+        self.logger.info(f"Migrated {cursor.rowcount} blink timestamps to epoch seconds")
+    
+    @staticmethod
+    def _to_epoch(value) -> int:
+        """Epoch seconds for a datetime (naive = local time) or a number"""
+        if isinstance(value, datetime):
+            return int(value.timestamp())
+        return int(value)
+    
+    @staticmethod
+    def _from_epoch(value) -> Optional[str]:
+        """Local time ISO string for stored epoch seconds"""
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value).isoformat(sep=' ')
+    
     def record_blink(self, timestamp: datetime, ear_value: float = None, session_id: int = None):
-        """Record a single blink event"""
+        """Record a single blink event (written shortly after by the writer thread)"""
+        self._write_queue.put_nowait((timestamp, ear_value, session_id))
+    
+    def add_blinks_batch(self, blinks: List[tuple]):
+        """Record several blink events (written shortly after by the writer thread)
+        
+        Args:
+            blinks: (timestamp, ear_value, session_id) tuples
+        """
+        for blink in blinks:
+            self._write_queue.put_nowait(blink)
+    
+    def _writer_loop(self):
+        """Drain queued blinks, committing each batch in one transaction"""
+        while True:
+            item = self._write_queue.get()
+            batch = []
+            deadline = time.monotonic() + self.WRITE_BATCH_WAIT
+            while item is not self._WRITER_STOP:
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.WRITE_BATCH_MAX or remaining <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            self._insert_blinks(batch)
+            if item is self._WRITER_STOP:
+                return
+    
+    def _insert_blinks(self, blinks: List[tuple]):
+        """Insert blink rows in one transaction"""
+        if not blinks:
+            return
+        
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT INTO blinks (timestamp, ear_value, session_id)
-                VALUES (?, ?, ?)
-            ''', (timestamp, ear_value, session_id))
-            
-            self.connection.commit()
-            self.logger.debug(f"Blink recorded: {timestamp}")
-            
+            with self._write_lock:
+                cursor = self.connection.cursor()
+                cursor.executemany(_SQL_INSERT_BLINK, [
+                    (self._to_epoch(timestamp), ear_value, session_id)
+                    for timestamp, ear_value, session_id in blinks
+                ])
+                
+                self.connection.commit()
+                self._stats_cache = None
+                self.logger.debug("%d blinks recorded", len(blinks))
+                
         except Exception as e:
-            self.logger.error(f"Error recording blink: {e}")
+            self.logger.error(f"Error recording blinks: {e}")
     
     def get_total_blinks(self) -> int:
         """Get total number of recorded blinks"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute('SELECT COUNT(*) FROM blinks')
+            cursor.execute(_SQL_COUNT_BLINKS)
             result = cursor.fetchone()
             return result[0] if result else 0
             
@@ -115,20 +241,26 @@ class DatabaseManager:
     def get_blinks_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Dict]:
         """Get blinks within a specific date range"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                SELECT * FROM blinks 
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp
-            ''', (start_date, end_date))
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return list(self.iter_blinks_by_date_range(start_date, end_date))
             
         except Exception as e:
             self.logger.error(f"Error getting blinks by date range: {e}")
             return []
     
+    def iter_blinks_by_date_range(self, start_date: datetime, end_date: datetime) -> Iterator[Dict]:
+        """Yield blinks within a date range as they are read, for large ranges"""
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            SELECT * FROM blinks 
+            WHERE timestamp BETWEEN ? AND ?
+            ORDER BY timestamp
+        ''', (self._to_epoch(start_date), self._to_epoch(end_date)))
+        
+        for row in cursor:
+            blink = dict(row)
+            blink['timestamp'] = self._from_epoch(blink['timestamp'])
+            yield blink
+    
     def get_daily_stats(self, date: datetime = None) -> Dict:
         """Get blink statistics for a specific day"""
         if date is None:
@@ -138,6 +270,8 @@ class DatabaseManager:
             # Get start and end of the day
             start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
             end_of_day = start_of_day + timedelta(days=1)
+            day_start = self._to_epoch(start_of_day)
+            day_end = self._to_epoch(end_of_day)
             
             cursor = self.connection.cursor()
             
@@ -148,29 +282,30 @@ class DatabaseManager:
                        MAX(timestamp) as last_blink
                 FROM blinks 
                 WHERE timestamp BETWEEN ? AND ?
-            ''', (start_of_day, end_of_day))
+            ''', (day_start, day_end))
             
             result = cursor.fetchone()
             
             if result and result['total_blinks'] > 0:
-                # Calculate hourly distribution
+                # Calculate hourly distribution by local hour, which stays
+                # correct on days with a DST change
                 cursor.execute('''
-                    SELECT strftime('%H', timestamp) as hour,
+                    SELECT CAST(strftime('%H', timestamp, 'unixepoch', 'localtime') AS INTEGER) as hour,
                            COUNT(*) as blinks
                     FROM blinks 
                     WHERE timestamp BETWEEN ? AND ?
                     GROUP BY hour
                     ORDER BY hour
-                ''', (start_of_day, end_of_day))
+                ''', (day_start, day_end))
                 
                 hourly_data = cursor.fetchall()
-                hourly_distribution = {int(row['hour']): row['blinks'] for row in hourly_data}
+                hourly_distribution = {row['hour']: row['blinks'] for row in hourly_data}
                 
                 return {
                     'date': date.date().isoformat(),
                     'total_blinks': result['total_blinks'],
-                    'first_blink': result['first_blink'],
-                    'last_blink': result['last_blink'],
+                    'first_blink': self._from_epoch(result['first_blink']),
+                    'last_blink': self._from_epoch(result['last_blink']),
                     'hourly_distribution': hourly_distribution
                 }
             else:
@@ -196,12 +331,47 @@ class DatabaseManager:
             days_since_monday = date.weekday()
             start_of_week = date - timedelta(days=days_since_monday)
             start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
+            week_start = self._to_epoch(start_of_week)
+            week_end = self._to_epoch(start_of_week + timedelta(days=7))
+            
+            # All seven days' hourly counts in one grouped query, bucketed by
+            # local date and hour so DST changes don't shift the hours
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT strftime('%Y-%m-%d', timestamp, 'unixepoch', 'localtime') as day,
+                       CAST(strftime('%H', timestamp, 'unixepoch', 'localtime') AS INTEGER) as hour,
+                       COUNT(*) as blinks,
+                       MIN(timestamp) as first_blink,
+                       MAX(timestamp) as last_blink
+                FROM blinks 
+                WHERE timestamp >= ? AND timestamp < ?
+                GROUP BY day, hour
+            ''', (week_start, week_end))
+            
+            days = defaultdict(list)
+            for row in cursor.fetchall():
+                days[row['day']].append((row['hour'], row))
             
             weekly_stats = []
             for i in range(7):
-                day = start_of_week + timedelta(days=i)
-                daily_stats = self.get_daily_stats(day)
-                weekly_stats.append(daily_stats)
+                day = (start_of_week + timedelta(days=i)).date().isoformat()
+                rows = days.get(day)
+                if rows:
+                    weekly_stats.append({
+                        'date': day,
+                        'total_blinks': sum(row['blinks'] for _, row in rows),
+                        'first_blink': self._from_epoch(min(row['first_blink'] for _, row in rows)),
+                        'last_blink': self._from_epoch(max(row['last_blink'] for _, row in rows)),
+                        'hourly_distribution': {hour: row['blinks'] for hour, row in rows}
+                    })
+                else:
+                    weekly_stats.append({
+                        'date': day,
+                        'total_blinks': 0,
+                        'first_blink': None,
+                        'last_blink': None,
+                        'hourly_distribution': {}
+                    })
             
             return weekly_stats
             
@@ -212,29 +382,31 @@ class DatabaseManager:
     def save_session(self, session_data: Dict) -> int:
         """Save a tracking session"""
         try:
-            cursor = self.connection.cursor()
-            
-            duration = (session_data['end_time'] - session_data['start_time']).total_seconds()
-            avg_bpm = (session_data['total_blinks'] * 60) / duration if duration > 0 else 0
-            
-            cursor.execute('''
-                INSERT INTO sessions (start_time, end_time, total_blinks, duration_seconds, average_bpm, notes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                session_data['start_time'],
-                session_data['end_time'],
-                session_data['total_blinks'],
-                int(duration),
-                avg_bpm,
-                session_data.get('notes', '')
-            ))
-            
-            session_id = cursor.lastrowid
-            self.connection.commit()
-            
-            self.logger.info(f"Session saved with ID: {session_id}")
-            return session_id
-            
+            with self._write_lock:
+                cursor = self.connection.cursor()
+                
+                duration = (session_data['end_time'] - session_data['start_time']).total_seconds()
+                avg_bpm = (session_data['total_blinks'] * 60) / duration if duration > 0 else 0
+                
+                cursor.execute('''
+                    INSERT INTO sessions (start_time, end_time, total_blinks, duration_seconds, average_bpm, notes)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    session_data['start_time'],
+                    session_data['end_time'],
+                    session_data['total_blinks'],
+                    int(duration),
+                    avg_bpm,
+                    session_data.get('notes', '')
+                ))
+                
+                session_id = cursor.lastrowid
+                self.connection.commit()
+                self._stats_cache = None
+                
+                self.logger.info(f"Session saved with ID: {session_id}")
+                return session_id
+                
         except Exception as e:
             self.logger.error(f"Error saving session: {e}")
             return -1
@@ -249,8 +421,7 @@ class DatabaseManager:
                 LIMIT ?
             ''', (limit,))
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [dict(row) for row in cursor]
             
         except Exception as e:
             self.logger.error(f"Error getting recent sessions: {e}")
@@ -260,7 +431,7 @@ class DatabaseManager:
         """Get a setting value"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
+            cursor.execute(_SQL_GET_SETTING, (key,))
             result = cursor.fetchone()
             
             return result['value'] if result else default_value
@@ -270,39 +441,81 @@ class DatabaseManager:
             return default_value
     
     def set_setting(self, key: str, value: str):
-        """Set a setting value"""
+        """Set a setting value (deferred inside batch_settings)"""
+        pending = getattr(self._settings_batch, 'pending', None)
+        if pending is not None:
+            pending[key] = value
+            return
+        self._write_settings([(key, value)])
+    
+    def set_settings(self, settings: Dict[str, str]):
+        """Set several settings in one transaction (deferred inside batch_settings)"""
+        pending = getattr(self._settings_batch, 'pending', None)
+        if pending is not None:
+            pending.update(settings)
+            return
+        self._write_settings(list(settings.items()))
+    
+    @contextmanager
+    def batch_settings(self):
+        """Collect set_setting calls made on this thread and commit them together"""
+        if getattr(self._settings_batch, 'pending', None) is not None:
+            # Already batching; the outer block writes
+            yield
+            return
+        
+        self._settings_batch.pending = {}
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO settings (key, value, updated_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-            ''', (key, value))
-            
-            self.connection.commit()
-            self.logger.debug(f"Setting saved: {key} = {value}")
-            
+            yield
+        finally:
+            pending = self._settings_batch.pending
+            self._settings_batch.pending = None
+            self._write_settings(list(pending.items()))
+    
+    def _write_settings(self, settings: List[tuple]):
+        """Write (key, value) settings in one transaction"""
+        if not settings:
+            return
+        
+        try:
+            with self._write_lock:
+                cursor = self.connection.cursor()
+                cursor.executemany(_SQL_SET_SETTING, settings)
+                
+                self.connection.commit()
+                for key, value in settings:
+                    self.logger.debug("Setting saved: %s = %s", key, value)
+                
         except Exception as e:
-            self.logger.error(f"Error setting {key}: {e}")
+            self.logger.error(f"Error saving settings {[key for key, _ in settings]}: {e}")
     
     def get_statistics_summary(self) -> Dict:
         """Get comprehensive statistics summary"""
+        cached = self._stats_cache
+        if cached is not None and time.monotonic() - self._stats_cache_time < self.STATS_CACHE_TTL:
+            return cached.copy()
+        
         try:
             cursor = self.connection.cursor()
             
-            # Total blinks
-            cursor.execute('SELECT COUNT(*) as total FROM blinks')
-            total_blinks = cursor.fetchone()['total']
-            
-            # Today's blinks
-            today_stats = self.get_daily_stats()
+            # Total, today's and last 30 days' blinks in one pass
+            now = datetime.now()
+            start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            end_of_day = start_of_day + timedelta(days=1)
+            thirty_days_ago = now - timedelta(days=30)
+            cursor.execute('''
+                SELECT COUNT(*) as total,
+                       SUM(timestamp BETWEEN ? AND ?) as today,
+                       SUM(timestamp >= ?) as recent
+                FROM blinks
+            ''', (self._to_epoch(start_of_day), self._to_epoch(end_of_day),
+                  self._to_epoch(thirty_days_ago)))
+            counts = cursor.fetchone()
+            total_blinks = counts['total']
+            today_blinks = counts['today'] or 0
+            recent_blinks = counts['recent'] or 0
             
             # Average blinks per day (last 30 days)
-            thirty_days_ago = datetime.now() - timedelta(days=30)
-            cursor.execute('''
-                SELECT COUNT(*) as total FROM blinks 
-                WHERE timestamp >= ?
-            ''', (thirty_days_ago,))
-            recent_blinks = cursor.fetchone()['total']
             avg_per_day = recent_blinks / 30 if recent_blinks > 0 else 0
             
             # Session statistics
@@ -314,14 +527,17 @@ class DatabaseManager:
             ''', )
             session_stats = cursor.fetchone()
             
-            return {
+            summary = {
                 'total_blinks': total_blinks,
-                'today_blinks': today_stats.get('total_blinks', 0),
+                'today_blinks': today_blinks,
                 'average_per_day': round(avg_per_day, 1),
                 'total_sessions': session_stats['total_sessions'] or 0,
                 'average_session_duration': round(session_stats['avg_duration'] or 0, 1),
                 'average_bpm': round(session_stats['avg_bpm'] or 0, 1)
             }
+            self._stats_cache_time = time.monotonic()
+            self._stats_cache = summary
+            return summary.copy()
             
         except Exception as e:
             self.logger.error(f"Error getting statistics summary: {e}")
@@ -332,20 +548,38 @@ class DatabaseManager:
         try:
             cutoff_date = datetime.now() - timedelta(days=days_to_keep)
             
-            cursor = self.connection.cursor()
-            cursor.execute('DELETE FROM blinks WHERE timestamp < ?', (cutoff_date,))
-            cursor.execute('DELETE FROM sessions WHERE start_time < ?', (cutoff_date,))
-            
-            deleted_blinks = cursor.rowcount
-            self.connection.commit()
-            
-            self.logger.info(f"Cleaned up {deleted_blinks} old records")
-            
+            with self._write_lock:
+                # Both deletes in one transaction, taking the write lock up front
+                cursor = self.connection.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                try:
+                    cursor.execute('DELETE FROM blinks WHERE timestamp < ?',
+                                   (self._to_epoch(cutoff_date),))
+                    deleted_blinks = cursor.rowcount
+                    cursor.execute('DELETE FROM sessions WHERE start_time < ?', (cutoff_date,))
+                    self.connection.commit()
+                    self._stats_cache = None
+                except Exception:
+                    self.connection.rollback()
+                    raise
+                
+                self.logger.info(f"Cleaned up {deleted_blinks} old records")
+                
         except Exception as e:
             self.logger.error(f"Error cleaning up old data: {e}")
     
     def close(self):
         """Close database connection"""
+        # Let the writer commit what is still queued
+        if self._writer.is_alive():
+            self._write_queue.put(self._WRITER_STOP)
+            self._writer.join()
+        
         if self.connection:
+            # Refresh planner statistics where SQLite thinks they are stale
+            try:
+                self.connection.execute('PRAGMA optimize')
+            except Exception as e:
+                self.logger.debug(f"PRAGMA optimize failed: {e}")
             self.connection.close()
             self.logger.info("Database connection closed")
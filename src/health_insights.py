@@ -14,30 +14,265 @@ Medical References:
 """
 
 import logging
+import math
 import time
-from typing import Dict, List, Optional
+from bisect import bisect_right
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
 
+import numpy as np
 
-class AlertLevel(Enum):
-    """Alert severity levels"""
+
+class AlertLevel(IntEnum):
+    """Alert severity levels (ordered, usable as indices)"""
     INFO = 0
     WARNING = 1
     ALERT = 2
     CRITICAL = 3
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class HealthInsight:
-    """Health insight data structure"""
+    """Health insight data structure (immutable, so templates can be shared)"""
     status: str
     level: AlertLevel
     title: str
     message: str
-    recommendations: List[str]
+    recommendations: Tuple[str, ...]
     medical_note: str
     icon: str
+    top_recommendations: str = ''  # notification text for the first two
+
+
+def _template(**fields) -> HealthInsight:
+    """Build an alert template with its notification recommendations preformatted"""
+    top = fields['recommendations'][:2]
+    fields['top_recommendations'] = '\n\nTop recommendations:\n' + '\n'.join('\u2022 ' + rec for rec in top)
+    return HealthInsight(**fields)
+
+
+# Alert content that doesn't depend on the reading, built once at import.
+# Only the message is formatted per alert, from a %-format constant.
+_SEVERELY_LOW_MESSAGE = ('Your blink rate is %.1f per minute, significantly below normal (12-20 BPM). '
+                         'This is commonly associated with intense screen use.')
+_SEVERELY_LOW_TEMPLATE = _template(
+    status='critical',
+    level=AlertLevel.CRITICAL,
+    title='Severely Reduced Blink Rate',
+    message=None,
+    recommendations=(
+        '⚠️ Take an immediate break from the screen',
+        '💧 Use artificial tears or lubricating eye drops',
+        '👀 Practice conscious blinking exercises',
+        '🏥 Consider consulting an eye care professional if symptoms persist',
+        '💻 Reduce screen brightness and increase text size',
+        '🌡️ Check room humidity (aim for 30-50%)'
+    ),
+    medical_note='Studies show that blink rate can decrease by up to 60% during computer use, '
+                'leading to dry eye syndrome (Tsubota & Nakamori, 1993).',
+    icon='🚨'
+)
+
+_LOW_MESSAGE = ('Your blink rate is %.1f per minute, below normal (12-20 BPM). '
+                'This may indicate digital eye strain.')
+_LOW_TEMPLATE = _template(
+    status='warning',
+    level=AlertLevel.WARNING,
+    title='Reduced Blink Rate Detected',
+    message=None,
+    recommendations=(
+        '😌 Take a 20-second break every 20 minutes',
+        '💧 Blink consciously and completely',
+        '📏 Follow the 20-20-20 rule',
+        '💻 Position screen 20-26 inches from eyes',
+        '🌊 Stay hydrated - drink water regularly'
+    ),
+    medical_note='Normal spontaneous blink rate ranges from 12-20 blinks per minute '
+                '(Patel et al., 2011). Reduced blinking can lead to tear film instability.',
+    icon='⚠️'
+)
+
+_VERY_HIGH_MESSAGE = ('Your blink rate is %.1f per minute, significantly above normal (12-20 BPM). '
+                      'This may indicate eye irritation or fatigue.')
+_VERY_HIGH_TEMPLATE = _template(
+    status='alert',
+    level=AlertLevel.ALERT,
+    title='Excessive Blink Rate Detected',
+    message=None,
+    recommendations=(
+        '🛑 Take an immediate break from the screen',
+        '💧 Check if eyes feel dry or irritated',
+        '🌡️ Ensure proper lighting (avoid glare)',
+        '🧹 Check for environmental irritants (dust, smoke, dry air)',
+        '😎 Consider using blue light filtering glasses',
+        '🏥 If persistent, consult an eye care professional'
+    ),
+    medical_note='Excessive blinking can be caused by dry eyes, eye irritation, allergies, '
+                'or eye strain (Bentivoglio et al., 1997).',
+    icon='⚡'
+)
+
+_ELEVATED_MESSAGE = ('Your blink rate is %.1f per minute, slightly above normal (12-20 BPM). '
+                     'This could indicate mild eye fatigue.')
+_ELEVATED_TEMPLATE = _template(
+    status='elevated',
+    level=AlertLevel.INFO,
+    title='Elevated Blink Rate',
+    message=None,
+    recommendations=(
+        '😌 Take short breaks periodically',
+        '💧 Ensure adequate hydration',
+        '🌡️ Check room temperature and humidity',
+        '💻 Adjust screen position and brightness'
+    ),
+    medical_note='Slightly elevated blink rates may occur during tasks requiring concentration '
+                'or in response to environmental factors.',
+    icon='📊'
+)
+
+_EXTENDED_WORK_MESSAGE = ('You\'ve been working for %.0f minutes without a break. '
+                          'Extended screen time increases risk of eye strain.')
+_EXTENDED_WORK_TEMPLATE = _template(
+    status='extended_work',
+    level=AlertLevel.CRITICAL,
+    title='Extended Screen Time Alert',
+    message=None,
+    recommendations=(
+        '🚨 TAKE A BREAK NOW - You\'ve exceeded recommended continuous screen time',
+        '🚶 Stand up, walk around for 5-10 minutes',
+        '👀 Give your eyes a complete rest from screens',
+        '💧 Hydrate and rest your eyes'
+    ),
+    medical_note='Prolonged screen time without breaks significantly increases the risk of '
+                'computer vision syndrome (Rosenfield, 2016).',
+    icon='🛑'
+)
+
+_BREAK_REMINDER_MESSAGE = 'You\'ve been working for %.0f minutes. Time for a break!'
+_BREAK_REMINDER_TEMPLATE = _template(
+    status='break_reminder',
+    level=AlertLevel.INFO,
+    title='Break Reminder',
+    message=None,
+    recommendations=(
+        '⏰ Take a 5-10 minute break',
+        '🚶 Stand up and stretch',
+        '👀 Look at distant objects',
+        '💧 Drink some water'
+    ),
+    medical_note='Regular breaks help prevent eye strain and maintain productivity.',
+    icon='⏰'
+)
+
+
+def _from_template(template: HealthInsight, message: str) -> HealthInsight:
+    """Copy an alert template with its message filled in"""
+    return HealthInsight(template.status, template.level, template.title, message,
+                         template.recommendations, template.medical_note, template.icon,
+                         template.top_recommendations)
+
+
+# Blink rate interpretations, one shared read-only mapping per category
+_RATE_NO_DATA = MappingProxyType({
+    'category': 'No Data',
+    'description': 'Start tracking to see your blink rate',
+    'color': 'gray'
+})
+_RATE_SEVERELY_LOW = MappingProxyType({
+    'category': 'Severely Low',
+    'description': 'Significant reduction - immediate action recommended',
+    'color': 'red'
+})
+_RATE_BELOW_NORMAL = MappingProxyType({
+    'category': 'Below Normal',
+    'description': 'Reduced blinking - may indicate eye strain',
+    'color': 'orange'
+})
+_RATE_NORMAL = MappingProxyType({
+    'category': 'Normal',
+    'description': 'Healthy blink rate',
+    'color': 'green'
+})
+_RATE_ELEVATED = MappingProxyType({
+    'category': 'Elevated',
+    'description': 'Increased blinking - check for irritation',
+    'color': 'yellow'
+})
+_RATE_VERY_HIGH = MappingProxyType({
+    'category': 'Very High',
+    'description': 'Excessive blinking - may need attention',
+    'color': 'red'
+})
+
+# Categories by band id, as classify_series returns them
+RATE_INTERPRETATIONS = (_RATE_NO_DATA, _RATE_SEVERELY_LOW, _RATE_BELOW_NORMAL,
+                        _RATE_NORMAL, _RATE_ELEVATED, _RATE_VERY_HIGH)
+RATE_CATEGORY_NAMES = np.array([rate['category'] for rate in RATE_INTERPRETATIONS], dtype=object)
+
+
+# General tips and disclaimer are fixed text, built once and shared
+_GENERAL_TIPS = (
+    MappingProxyType({
+        'title': '20-20-20 Rule',
+        'description': 'Every 20 minutes, look at something 20 feet away for 20 seconds',
+        'reference': 'American Optometric Association recommendation'
+    }),
+    MappingProxyType({
+        'title': 'Proper Lighting',
+        'description': 'Ensure room lighting is similar to screen brightness',
+        'reference': 'Rosenfield, M. (2016). Computer vision syndrome'
+    }),
+    MappingProxyType({
+        'title': 'Screen Position',
+        'description': 'Position screen 20-26 inches from eyes, slightly below eye level',
+        'reference': 'OSHA guidelines for computer workstation ergonomics'
+    }),
+    MappingProxyType({
+        'title': 'Blink Consciously',
+        'description': 'Make a conscious effort to blink completely and regularly',
+        'reference': 'Tsubota & Nakamori (1993). Dry eyes and video display terminals'
+    }),
+    MappingProxyType({
+        'title': 'Humidity Control',
+        'description': 'Maintain room humidity between 30-50%',
+        'reference': 'American Academy of Ophthalmology recommendations'
+    }),
+    MappingProxyType({
+        'title': 'Regular Eye Exams',
+        'description': 'Get comprehensive eye exams annually',
+        'reference': 'American Academy of Ophthalmology guidelines'
+    })
+)
+
+_MEDICAL_DISCLAIMER = """
+MEDICAL DISCLAIMER
+
+This application is designed for educational and informational purposes only. 
+It is NOT a substitute for professional medical advice, diagnosis, or treatment.
+
+Key Points:
+• The health insights provided are based on general medical literature and research
+• Individual health conditions vary significantly
+• This tool does not diagnose medical conditions
+• Always consult qualified healthcare professionals for medical concerns
+• If you experience persistent eye problems, seek professional eye care
+• In case of emergency eye conditions, seek immediate medical attention
+
+References:
+This application's health recommendations are based on peer-reviewed medical literature 
+including research from the New England Journal of Medicine, Optometry and Vision Science, 
+Movement Disorders, and guidelines from the American Academy of Ophthalmology and 
+American Optometric Association.
+
+Data Privacy:
+All blink data and health insights are stored locally on your device. 
+No health information is transmitted to external servers.
+
+By using this application, you acknowledge that you have read and understood this disclaimer.
+"""
 
 
 class HealthInsightsMonitor:
@@ -59,14 +294,19 @@ class HealthInsightsMonitor:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.last_alert_time = {}
         self.alert_cooldown = 300  # 5 minutes between same alerts
+        self._cooldown_ns = self.alert_cooldown * 1_000_000_000
+        # Monotonic time each alert type may next be shown
+        self._next_allowed_ns = defaultdict(int)
         
     def analyze_blink_pattern(self, blinks_per_minute: float, 
                              session_duration_seconds: int) -> Optional[HealthInsight]:
         """
         Analyze blink patterns and provide health insights
         
+        Only compares two scalars per call (once per health-check tick), so
+        it stays plain Python rather than a compiled numeric kernel.
+        
         Args:
             blinks_per_minute: Current blink rate
             session_duration_seconds: Duration of current session
@@ -76,256 +316,97 @@ class HealthInsightsMonitor:
         """
         duration_minutes = session_duration_seconds / 60
         
-        # Analyze blink rate
-        if blinks_per_minute < self.VERY_LOW_THRESHOLD and blinks_per_minute > 0:
-            return self._create_severely_low_alert(blinks_per_minute, duration_minutes)
-        elif blinks_per_minute < self.LOW_THRESHOLD and blinks_per_minute > 0:
-            return self._create_low_alert(blinks_per_minute, duration_minutes)
-        elif blinks_per_minute > self.VERY_HIGH_THRESHOLD:
-            return self._create_very_high_alert(blinks_per_minute, duration_minutes)
-        elif blinks_per_minute > self.HIGH_THRESHOLD:
-            return self._create_elevated_alert(blinks_per_minute, duration_minutes)
-        elif duration_minutes >= self.MAX_CONTINUOUS_WORK:
-            return self._create_extended_work_alert(duration_minutes)
-        elif duration_minutes >= self.LONG_BREAK_INTERVAL:
-            return self._create_break_reminder(duration_minutes)
-            
+        # Analyze blink rate (no rate yet means no rate alert)
+        if blinks_per_minute > 0:
+            builder = self._BPM_BUILDERS[bisect_right(self._BPM_BOUNDS, blinks_per_minute)]
+            if builder is not None:
+                return builder(self, blinks_per_minute, duration_minutes)
+        
+        # Then session length
+        builder = self._DURATION_BUILDERS[bisect_right(self._DURATION_BOUNDS, duration_minutes)]
+        if builder is not None:
+            return builder(self, duration_minutes)
+        
         return None
     
     def _create_severely_low_alert(self, bpm: float, duration: float) -> HealthInsight:
         """Create alert for severely reduced blink rate"""
-        return HealthInsight(
-            status='critical',
-            level=AlertLevel.CRITICAL,
-            title='Severely Reduced Blink Rate',
-            message=f'Your blink rate is {bpm:.1f} per minute, significantly below normal (12-20 BPM). '
-                   'This is commonly associated with intense screen use.',
-            recommendations=[
-                '⚠️ Take an immediate break from the screen',
-                '💧 Use artificial tears or lubricating eye drops',
-                '👀 Practice conscious blinking exercises',
-                '🏥 Consider consulting an eye care professional if symptoms persist',
-                '💻 Reduce screen brightness and increase text size',
-                '🌡️ Check room humidity (aim for 30-50%)'
-            ],
-            medical_note='Studies show that blink rate can decrease by up to 60% during computer use, '
-                        'leading to dry eye syndrome (Tsubota & Nakamori, 1993).',
-            icon='🚨'
-        )
+        return _from_template(_SEVERELY_LOW_TEMPLATE, _SEVERELY_LOW_MESSAGE % (bpm,))
     
     def _create_low_alert(self, bpm: float, duration: float) -> HealthInsight:
         """Create alert for reduced blink rate"""
-        return HealthInsight(
-            status='warning',
-            level=AlertLevel.WARNING,
-            title='Reduced Blink Rate Detected',
-            message=f'Your blink rate is {bpm:.1f} per minute, below normal (12-20 BPM). '
-                   'This may indicate digital eye strain.',
-            recommendations=[
-                '😌 Take a 20-second break every 20 minutes',
-                '💧 Blink consciously and completely',
-                '📏 Follow the 20-20-20 rule',
-                '💻 Position screen 20-26 inches from eyes',
-                '🌊 Stay hydrated - drink water regularly'
-            ],
-            medical_note='Normal spontaneous blink rate ranges from 12-20 blinks per minute '
-                        '(Patel et al., 2011). Reduced blinking can lead to tear film instability.',
-            icon='⚠️'
-        )
+        return _from_template(_LOW_TEMPLATE, _LOW_MESSAGE % (bpm,))
     
     def _create_very_high_alert(self, bpm: float, duration: float) -> HealthInsight:
         """Create alert for excessive blink rate"""
-        return HealthInsight(
-            status='alert',
-            level=AlertLevel.ALERT,
-            title='Excessive Blink Rate Detected',
-            message=f'Your blink rate is {bpm:.1f} per minute, significantly above normal (12-20 BPM). '
-                   'This may indicate eye irritation or fatigue.',
-            recommendations=[
-                '🛑 Take an immediate break from the screen',
-                '💧 Check if eyes feel dry or irritated',
-                '🌡️ Ensure proper lighting (avoid glare)',
-                '🧹 Check for environmental irritants (dust, smoke, dry air)',
-                '😎 Consider using blue light filtering glasses',
-                '🏥 If persistent, consult an eye care professional'
-            ],
-            medical_note='Excessive blinking can be caused by dry eyes, eye irritation, allergies, '
-                        'or eye strain (Bentivoglio et al., 1997).',
-            icon='⚡'
-        )
+        return _from_template(_VERY_HIGH_TEMPLATE, _VERY_HIGH_MESSAGE % (bpm,))
     
     def _create_elevated_alert(self, bpm: float, duration: float) -> HealthInsight:
         """Create alert for elevated blink rate"""
-        return HealthInsight(
-            status='elevated',
-            level=AlertLevel.INFO,
-            title='Elevated Blink Rate',
-            message=f'Your blink rate is {bpm:.1f} per minute, slightly above normal (12-20 BPM). '
-                   'This could indicate mild eye fatigue.',
-            recommendations=[
-                '😌 Take short breaks periodically',
-                '💧 Ensure adequate hydration',
-                '🌡️ Check room temperature and humidity',
-                '💻 Adjust screen position and brightness'
-            ],
-            medical_note='Slightly elevated blink rates may occur during tasks requiring concentration '
-                        'or in response to environmental factors.',
-            icon='📊'
-        )
+        return _from_template(_ELEVATED_TEMPLATE, _ELEVATED_MESSAGE % (bpm,))
     
     def _create_extended_work_alert(self, duration: float) -> HealthInsight:
         """Create alert for extended screen time"""
-        return HealthInsight(
-            status='extended_work',
-            level=AlertLevel.CRITICAL,
-            title='Extended Screen Time Alert',
-            message=f'You\'ve been working for {duration:.0f} minutes without a break. '
-                   'Extended screen time increases risk of eye strain.',
-            recommendations=[
-                '🚨 TAKE A BREAK NOW - You\'ve exceeded recommended continuous screen time',
-                '🚶 Stand up, walk around for 5-10 minutes',
-                '👀 Give your eyes a complete rest from screens',
-                '💧 Hydrate and rest your eyes'
-            ],
-            medical_note='Prolonged screen time without breaks significantly increases the risk of '
-                        'computer vision syndrome (Rosenfield, 2016).',
-            icon='🛑'
-        )
+        return _from_template(_EXTENDED_WORK_TEMPLATE, _EXTENDED_WORK_MESSAGE % (duration,))
     
     def _create_break_reminder(self, duration: float) -> HealthInsight:
         """Create reminder for taking a break"""
-        return HealthInsight(
-            status='break_reminder',
-            level=AlertLevel.INFO,
-            title='Break Reminder',
-            message=f'You\'ve been working for {duration:.0f} minutes. Time for a break!',
-            recommendations=[
-                '⏰ Take a 5-10 minute break',
-                '🚶 Stand up and stretch',
-                '👀 Look at distant objects',
-                '💧 Drink some water'
-            ],
-            medical_note='Regular breaks help prevent eye strain and maintain productivity.',
-            icon='⏰'
-        )
+        return _from_template(_BREAK_REMINDER_TEMPLATE, _BREAK_REMINDER_MESSAGE % (duration,))
+    
+    # Alert builders by bpm band, for bisect_right over the bounds. Low rates
+    # alert below a threshold and high rates above one, so the high bounds are
+    # nudged to the next float to make an exact 20 or 30 count as the lower band.
+    _BPM_BOUNDS = (VERY_LOW_THRESHOLD, LOW_THRESHOLD,
+                   math.nextafter(HIGH_THRESHOLD, math.inf),
+                   math.nextafter(VERY_HIGH_THRESHOLD, math.inf))
+    _BPM_BUILDERS = (_create_severely_low_alert, _create_low_alert, None,
+                     _create_elevated_alert, _create_very_high_alert)
+    
+    # Alert builders by session length in minutes (alerts from each bound on)
+    _DURATION_BOUNDS = (LONG_BREAK_INTERVAL, MAX_CONTINUOUS_WORK)
+    _DURATION_BUILDERS = (None, _create_break_reminder, _create_extended_work_alert)
+    
+    # Interpretation bands for classify_series, bounded the same way
+    _RATE_BOUNDS = np.array(_BPM_BOUNDS)
     
     def should_show_alert(self, alert_type: str) -> bool:
         """Check if alert should be shown (respects cooldown)"""
-        now = time.time()
-        last_alert = self.last_alert_time.get(alert_type, 0)
-        
-        if now - last_alert > self.alert_cooldown:
-            self.last_alert_time[alert_type] = now
+        now = time.monotonic_ns()
+        if now >= self._next_allowed_ns[alert_type]:
+            self._next_allowed_ns[alert_type] = now + self._cooldown_ns
             return True
         return False
     
-    def get_blink_rate_interpretation(self, bpm: float) -> Dict[str, str]:
-        """Get interpretation of blink rate"""
+    def get_blink_rate_interpretation(self, bpm: float) -> Mapping[str, str]:
+        """Get interpretation of blink rate (shared and read-only)"""
         if bpm == 0:
-            return {
-                'category': 'No Data',
-                'description': 'Start tracking to see your blink rate',
-                'color': 'gray'
-            }
-        elif bpm < self.VERY_LOW_THRESHOLD:
-            return {
-                'category': 'Severely Low',
-                'description': 'Significant reduction - immediate action recommended',
-                'color': 'red'
-            }
-        elif bpm < self.LOW_THRESHOLD:
-            return {
-                'category': 'Below Normal',
-                'description': 'Reduced blinking - may indicate eye strain',
-                'color': 'orange'
-            }
-        elif bpm >= self.NORMAL_BLINK_RATE['min'] and bpm <= self.NORMAL_BLINK_RATE['max']:
-            return {
-                'category': 'Normal',
-                'description': 'Healthy blink rate',
-                'color': 'green'
-            }
-        elif bpm <= self.HIGH_THRESHOLD:
-            return {
-                'category': 'Slightly Elevated',
-                'description': 'Mild increase - monitor for patterns',
-                'color': 'blue'
-            }
-        elif bpm <= self.VERY_HIGH_THRESHOLD:
-            return {
-                'category': 'Elevated',
-                'description': 'Increased blinking - check for irritation',
-                'color': 'yellow'
-            }
-        else:
-            return {
-                'category': 'Very High',
-                'description': 'Excessive blinking - may need attention',
-                'color': 'red'
-            }
+            return _RATE_NO_DATA
+        # Same bands as analyze_blink_pattern and classify_series
+        return RATE_INTERPRETATIONS[bisect_right(self._BPM_BOUNDS, bpm) + 1]
+    
+    def classify_series(self, bpm) -> np.ndarray:
+        """
+        Classify a whole series of blink rates at once, e.g. per-minute history
+        
+        Gives the same categories as get_blink_rate_interpretation.
+        
+        Args:
+            bpm: Array-like of blink rates
+            
+        Returns:
+            Array of ids into RATE_INTERPRETATIONS (RATE_CATEGORY_NAMES[ids]
+            gives the category names)
+        """
+        bpm = np.asarray(bpm, dtype=np.float64)
+        ids = np.searchsorted(self._RATE_BOUNDS, bpm, side='right') + 1
+        return np.where(bpm == 0, 0, ids)
     
     @staticmethod
-    def get_general_tips() -> List[Dict[str, str]]:
-        """Get general eye health tips"""
-        return [
-            {
-                'title': '20-20-20 Rule',
-                'description': 'Every 20 minutes, look at something 20 feet away for 20 seconds',
-                'reference': 'American Optometric Association recommendation'
-            },
-            {
-                'title': 'Proper Lighting',
-                'description': 'Ensure room lighting is similar to screen brightness',
-                'reference': 'Rosenfield, M. (2016). Computer vision syndrome'
-            },
-            {
-                'title': 'Screen Position',
-                'description': 'Position screen 20-26 inches from eyes, slightly below eye level',
-                'reference': 'OSHA guidelines for computer workstation ergonomics'
-            },
-            {
-                'title': 'Blink Consciously',
-                'description': 'Make a conscious effort to blink completely and regularly',
-                'reference': 'Tsubota & Nakamori (1993). Dry eyes and video display terminals'
-            },
-            {
-                'title': 'Humidity Control',
-                'description': 'Maintain room humidity between 30-50%',
-                'reference': 'American Academy of Ophthalmology recommendations'
-            },
-            {
-                'title': 'Regular Eye Exams',
-                'description': 'Get comprehensive eye exams annually',
-                'reference': 'American Academy of Ophthalmology guidelines'
-            }
-        ]
+    def get_general_tips() -> Tuple[Mapping[str, str], ...]:
+        """Get general eye health tips (shared and read-only)"""
+        return _GENERAL_TIPS
     
     @staticmethod
     def get_medical_disclaimer() -> str:
         """Get medical disclaimer text"""
-        return """
-MEDICAL DISCLAIMER
-
-This application is designed for educational and informational purposes only. 
-It is NOT a substitute for professional medical advice, diagnosis, or treatment.
-
-Key Points:
-• The health insights provided are based on general medical literature and research
-• Individual health conditions vary significantly
-• This tool does not diagnose medical conditions
-• Always consult qualified healthcare professionals for medical concerns
-• If you experience persistent eye problems, seek professional eye care
-• In case of emergency eye conditions, seek immediate medical attention
-
-References:
-This application's health recommendations are based on peer-reviewed medical literature 
-including research from the New England Journal of Medicine, Optometry and Vision Science, 
-Movement Disorders, and guidelines from the American Academy of Ophthalmology and 
-American Optometric Association.
-
-Data Privacy:
-All blink data and health insights are stored locally on your device. 
-No health information is transmitted to external servers.
-
-By using this application, you acknowledge that you have read and understood this disclaimer.
-"""
+        return _MEDICAL_DISCLAIMER
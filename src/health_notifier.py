@@ -5,22 +5,35 @@ Displays health alerts using system notifications
 
 import logging
 from typing import Optional
-try:
-    from plyer import notification
-    PLYER_AVAILABLE = True
-except ImportError:
-    PLYER_AVAILABLE = False
-    logging.warning("plyer not installed - notifications will be disabled")
 
 from health_insights import HealthInsight, AlertLevel
 
+# Notification glyphs, written as code points so the source encoding can't alter them
+_BULLET = "\u2022"
+_EYE_ICON = "\U0001F441\uFE0F"
+
 
 class HealthNotifier:
     """Display health alerts using system notifications"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.enabled = PLYER_AVAILABLE
+        # Notification timeouts in seconds, indexed by AlertLevel
+        self._timeouts = (10, 15, 20, 30)
+        
+        # plyer is imported only once a notifier exists. plyer.notification is
+        # a proxy resolving the platform backend on every attribute access;
+        # bind the backend's notify once instead
+        self._notify = None
+        try:
+            from plyer import notification
+            self._notify = notification.notify
+            self.enabled = True
+        except ImportError:
+            self.enabled = False
+        except Exception as e:
+            self.logger.warning(f"Notification backend unavailable: {e}")
+            self.enabled = False
         
         if not self.enabled:
             self.logger.warning("Notifications disabled - install plyer: pip install plyer")
@@ -33,7 +46,7 @@ class HealthNotifier:
             insight: HealthInsight object containing alert details
         """
         if not self.enabled:
-            self.logger.debug(f"Notification skipped (plyer not available): {insight.title}")
+            self.logger.debug("Notification skipped (plyer not available): %s", insight.title)
             return
         
         try:
@@ -44,10 +57,12 @@ class HealthNotifier:
             # Windows has a 256 character limit for notifications
             message = insight.message
             
-            # Add top 2 recommendations only
-            if insight.recommendations:
+            # Add top 2 recommendations only (preformatted on built-in alerts)
+            if insight.top_recommendations:
+                message += insight.top_recommendations
+            elif insight.recommendations:
                 message += "\n\nTop recommendations:\n"
-                message += "\n".join(f"• {rec}" for rec in insight.recommendations[:2])
+                message += "\n".join(f"{_BULLET} {rec}" for rec in insight.recommendations[:2])
             
             # Truncate if too long (Windows limit is 256 chars)
             max_length = 240  # Leave some margin
@@ -60,7 +75,7 @@ class HealthNotifier:
                 title = title[:60] + "..."
             
             # Show notification
-            notification.notify(
+            self._notify(
                 title=title,
                 message=message,
                 app_name="Eye Blink Tracker",
@@ -72,7 +87,7 @@ class HealthNotifier:
         except Exception as e:
             self.logger.error(f"Failed to show notification: {e}")
     
-    def show_simple_notification(self, title: str, message: str, icon: str = "👁️"):
+    def show_simple_notification(self, title: str, message: str, icon: str = _EYE_ICON):
         """
         Show a simple notification
         
@@ -85,7 +100,7 @@ class HealthNotifier:
             return
         
         try:
-            notification.notify(
+            self._notify(
                 title=f"{icon} {title}",
                 message=message,
                 app_name="Eye Blink Tracker",
@@ -96,13 +111,9 @@ class HealthNotifier:
     
     def _get_timeout(self, level: AlertLevel) -> int:
         """Get notification timeout based on alert level"""
-        timeouts = {
-            AlertLevel.INFO: 10,
-            AlertLevel.WARNING: 15,
-            AlertLevel.ALERT: 20,
-            AlertLevel.CRITICAL: 30
-        }
-        return timeouts.get(level, 10)
+        if 0 <= level < len(self._timeouts):
+            return self._timeouts[level]
+        return 10
     
     def is_available(self) -> bool:
         """Check if notifications are available"""
@@ -2,55 +2,120 @@
 System Tray Application for Eye Blink Tracker
 """
 
+import functools
 import logging
 import threading
+import time
 import webbrowser
-from PIL import Image, ImageDraw
-import pystray
-from pystray import MenuItem, Icon
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# pystray and PIL are imported where first used, so loading this module (or
+# constructing SystemTrayApp) doesn't pull in the imaging and GUI libraries
+
+# Eye, iris and pupil boxes of the default 64x64 icon, as the integers Pillow
+# truncates _eye_geometry's float boxes to
+_EYE_BOX_64 = (6, 19, 57, 44)
+_IRIS_BOX_64 = (19, 21, 44, 42)
+_PUPIL_BOX_64 = (26, 27, 37, 36)
+
+# Tooltip template and icon by tracking state index: stopped, tracking, paused
+_TOOLTIPS = (
+    "Eye Blink Tracker [STOPPED] - Right-click to start",
+    "Eye Blink Tracker [TRACKING] | Blinks: {blinks} | BPM: {bpm:.1f} | Time: {time}",
+    "Eye Blink Tracker [PAUSED] | Blinks: {blinks} | Time: {time}",
+)
+_ICON_STATES = ('idle', 'tracking', 'paused')
+
+def _format_duration(seconds):
+    """HH:MM:SS for a whole number of seconds"""
+    hours, rem = divmod(seconds, 3600)
+    minutes, seconds = divmod(rem, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def _logged(action, level=logging.ERROR):
+    """Log (instead of raise) a tray method's exceptions as 'Error <action>: ...'"""
+    def decorator(func):
+        def call(self, *args):
+            try:
+                return func(self, *args)
+            except Exception as e:
+                self.logger.log(level, "Error %s: %s", action, e)
+        
+        if func.__code__.co_argcount == 3:
+            # pystray passes a menu action as many arguments as its code
+            # declares, so keep the (icon, item) signature visible
+            def wrapper(self, icon, item):
+                return call(self, icon, item)
+        else:
+            wrapper = call
+        return functools.wraps(func)(wrapper)
+    return decorator
 
 class SystemTrayApp:
     """System tray application for background operation"""
     
+    # Drawn icons by (width, height, color1, color2); pystray only reads them
+    _ICON_CACHE = {}
+    
+    STATUS_DEBOUNCE_NS = 500_000_000  # minimum gap between status refreshes (0.5 s)
+    STATUS_IDLE_REFRESH = 10  # seconds between refreshes when nothing changed
+    
     def __init__(self, main_app):
         self.logger = logging.getLogger(__name__)
         self.main_app = main_app
         self.icon = None
         self.update_timer = None
+        self._last_title = None  # tooltip last handed to pystray
+        self._last_update_ns = 0  # monotonic time of the last update_status
+        # Enabled flags of the menu's tracking actions; kept current by the
+        # tray's own actions and by update_status for changes made elsewhere
+        self._menu_flags = {}
+        self._stats_text_cache = (None, "")  # (values shown, menu stats line)
+        self._recompute_menu_state(tracking=False, paused=False)
+        self._status_dirty = threading.Event()  # set by mark_dirty
+        # Tooltip changes inside begin_update()/end_update() apply once at the end
+        self._update_lock = threading.Lock()
+        self._update_depth = 0
+        self._pending_title = None
+        
+        # One icon per tracking state, drawn on first use and swapped in by update_status
+        self._icons = None
+        
+        # Tracking actions can block (opening a camera, joining the tracking
+        # thread), so the menu hands them to a worker instead of running them
+        # on the tray's UI thread. One worker keeps them in click order.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tray-action")
         
     def create_image(self, width=64, height=64, color1='black', color2='white'):
-        """Create the tray icon image"""
+        """Create the tray icon image (drawn once per size and colors)"""
+        key = (width, height, color1, color2)
+        image = self._ICON_CACHE.get(key)
+        if image is not None:
+            return image
+        
+        from PIL import Image, ImageDraw
+        
         try:
             # Create a simple eye icon
             image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
             draw = ImageDraw.Draw(image)
             
-            # Draw eye shape
-            eye_width = width * 0.8
-            eye_height = height * 0.4
-            eye_left = (width - eye_width) / 2
-            eye_top = (height - eye_height) / 2
+            if (width, height) == (64, 64):
+                eye_box, iris_box, pupil_box = _EYE_BOX_64, _IRIS_BOX_64, _PUPIL_BOX_64
+            else:
+                eye_box, iris_box, pupil_box = self._eye_geometry(width, height)
             
-            # Outer eye (white)
-            draw.ellipse([eye_left, eye_top, eye_left + eye_width, eye_top + eye_height], 
-                        fill='white', outline='black', width=2)
+            # Outer eye (color2, white by default)
+            draw.ellipse(eye_box, fill=color2, outline=color1, width=2)
             
             # Iris (blue)
-            iris_width = eye_width * 0.5
-            iris_height = eye_height * 0.8
-            iris_left = eye_left + (eye_width - iris_width) / 2
-            iris_top = eye_top + (eye_height - iris_height) / 2
-            draw.ellipse([iris_left, iris_top, iris_left + iris_width, iris_top + iris_height], 
-                        fill='lightblue', outline='darkblue', width=1)
+            draw.ellipse(iris_box, fill='lightblue', outline='darkblue', width=1)
             
             # Pupil (black)
-            pupil_width = iris_width * 0.4
-            pupil_height = iris_height * 0.4
-            pupil_left = iris_left + (iris_width - pupil_width) / 2
-            pupil_top = iris_top + (iris_height - pupil_height) / 2
-            draw.ellipse([pupil_left, pupil_top, pupil_left + pupil_width, pupil_top + pupil_height], 
-                        fill='black')
+            draw.ellipse(pupil_box, fill='black')
             
+            self._ICON_CACHE[key] = image
             return image
             
         except Exception as e:
@@ -59,8 +124,64 @@ class SystemTrayApp:
             image = Image.new('RGBA', (width, height), 'blue')
             return image
     
+    def _recompute_menu_state(self, tracking, paused):
+        """Store which tracking actions the menu enables for this state"""
+        self._menu_flags.update(
+            can_start=not tracking,
+            can_pause=tracking and not paused,
+            can_resume=tracking and paused,
+            can_stop=tracking,
+        )
+    
+    def _sync_menu_state(self):
+        """Recompute the menu flags from the app's actual tracking state
+        
+        For tray actions that failed because the state had already changed
+        elsewhere (e.g. tracking stopped on its own); also refreshes the tooltip.
+        """
+        tracking = bool(self.main_app.is_tracking)
+        paused = tracking and bool(self.main_app.blink_detector.is_paused)
+        self._recompute_menu_state(tracking=tracking, paused=paused)
+        self.mark_dirty()
+    
+    def _state_icons(self):
+        """Icons by tracking state ('idle', 'tracking', 'paused')"""
+        if self._icons is None:
+            self._icons = {
+                'idle': self.create_image(color2='gray'),
+                'tracking': self.create_image(color2='lightgreen'),
+                'paused': self.create_image(color2='orange'),
+            }
+        return self._icons
+    
+    @staticmethod
+    def _eye_geometry(width, height):
+        """Bounding boxes of the eye, iris and pupil for an icon size"""
+        # Outer eye, then iris and pupil centred within it
+        eye_width = width * 0.8
+        eye_height = height * 0.4
+        eye_left = (width - eye_width) / 2
+        eye_top = (height - eye_height) / 2
+        
+        iris_width = eye_width * 0.5
+        iris_height = eye_height * 0.8
+        iris_left = eye_left + (eye_width - iris_width) / 2
+        iris_top = eye_top + (eye_height - iris_height) / 2
+        
+        pupil_width = iris_width * 0.4
+        pupil_height = iris_height * 0.4
+        pupil_left = iris_left + (iris_width - pupil_width) / 2
+        pupil_top = iris_top + (iris_height - pupil_height) / 2
+        
+        return ((eye_left, eye_top, eye_left + eye_width, eye_top + eye_height),
+                (iris_left, iris_top, iris_left + iris_width, iris_top + iris_height),
+                (pupil_left, pupil_top, pupil_left + pupil_width, pupil_top + pupil_height))
+    
     def create_menu(self):
         """Create the context menu for the tray icon"""
+        import pystray
+        from pystray import MenuItem
+        
         try:
             # Get current stats for menu
             def get_stats_text(item):
@@ -68,13 +189,15 @@ class SystemTrayApp:
                     status = self.main_app.get_status()
                     stats = status.get('tracking_stats', {})
                     if status['is_tracking']:
-                        blinks = stats.get('session_blinks', 0)
-                        bpm = stats.get('blinks_per_minute', 0)
-                        duration = stats.get('session_duration', 0)
-                        hours = duration // 3600
-                        minutes = (duration % 3600) // 60
-                        seconds = duration % 60
-                        return f"📊 Blinks: {blinks} | BPM: {bpm:.1f} | Time: {hours:02d}:{minutes:02d}:{seconds:02d}"
+                        key = (stats.get('session_blinks', 0),
+                               round(stats.get('blinks_per_minute', 0), 1),
+                               stats.get('session_duration', 0))
+                        # Re-render only when the displayed values change
+                        if key != self._stats_text_cache[0]:
+                            blinks, bpm, duration = key
+                            text = f"📊 Blinks: {blinks} | BPM: {bpm:.1f} | Time: {_format_duration(duration)}"
+                            self._stats_text_cache = (key, text)
+                        return self._stats_text_cache[1]
                     return "📊 Not tracking"
                 except:
                     return "📊 Stats unavailable"
@@ -83,14 +206,14 @@ class SystemTrayApp:
                 MenuItem('Eye Blink Tracker', self.show_dashboard, default=True),
                 MenuItem(get_stats_text, None, enabled=False),  # Display-only stats
                 pystray.Menu.SEPARATOR,
-                MenuItem('Start Tracking', self.start_tracking, 
-                        enabled=lambda item: not self.main_app.is_tracking),
-                MenuItem('Pause Tracking', self.pause_tracking, 
-                        enabled=lambda item: self.main_app.is_tracking and not self.main_app.blink_detector.is_paused),
-                MenuItem('Resume Tracking', self.resume_tracking, 
-                        enabled=lambda item: self.main_app.is_tracking and self.main_app.blink_detector.is_paused),
-                MenuItem('Stop Tracking', self.stop_tracking, 
-                        enabled=lambda item: self.main_app.is_tracking),
+                MenuItem('Start Tracking', self._in_background(self.start_tracking), 
+                        enabled=lambda item, f=self._menu_flags: f['can_start']),
+                MenuItem('Pause Tracking', self._in_background(self.pause_tracking), 
+                        enabled=lambda item, f=self._menu_flags: f['can_pause']),
+                MenuItem('Resume Tracking', self._in_background(self.resume_tracking), 
+                        enabled=lambda item, f=self._menu_flags: f['can_resume']),
+                MenuItem('Stop Tracking', self._in_background(self.stop_tracking), 
+                        enabled=lambda item, f=self._menu_flags: f['can_stop']),
                 pystray.Menu.SEPARATOR,
                 MenuItem('Open Dashboard', self.show_dashboard),
                 MenuItem('Settings', self.show_settings),
@@ -103,193 +226,236 @@ class SystemTrayApp:
             self.logger.error(f"Error creating menu: {e}")
             return pystray.Menu(MenuItem('Exit', self.quit_application))
     
+    def _in_background(self, action):
+        """Menu callback that queues a (icon, item) action on the tray worker"""
+        return lambda icon, item: self._executor.submit(action, icon, item)
+    
+    @_logged("opening dashboard")
     def show_dashboard(self, icon, item):
         """Open the web dashboard"""
-        try:
-            webbrowser.open('http://localhost:5000')
-        except Exception as e:
-            self.logger.error(f"Error opening dashboard: {e}")
+        webbrowser.open('http://localhost:5000')
     
+    @_logged("showing status")
     def show_status(self, icon, item):
         """Show current status (could open a simple status window)"""
-        try:
-            status = self.main_app.get_status()
-            tracking_status = "Active" if status['is_tracking'] else "Stopped"
-            camera_status = "Available" if status['camera_available'] else "Not Available"
-            
-            message = f"Tracking: {tracking_status}\nCamera: {camera_status}"
-            
-            # For now, just log the status. In a full implementation,
-            # you might want to show a popup or notification
-            self.logger.info(f"Status requested: {message}")
-            
-        except Exception as e:
-            self.logger.error(f"Error showing status: {e}")
+        status = self.main_app.get_status()
+        tracking_status = "Active" if status['is_tracking'] else "Stopped"
+        camera_status = "Available" if status['camera_available'] else "Not Available"
+        
+        message = f"Tracking: {tracking_status}\nCamera: {camera_status}"
+        
+        # For now, just log the status. In a full implementation,
+        # you might want to show a popup or notification
+        self.logger.info(f"Status requested: {message}")
     
+    @_logged("starting tracking from tray")
     def start_tracking(self, icon, item):
         """Start eye tracking"""
-        try:
+        with self.batched_updates():
             success = self.main_app.start_tracking()
             if success:
+                self._recompute_menu_state(tracking=True, paused=False)
                 self.logger.info("Tracking started from system tray")
                 self.update_icon_title("Eye Blink Tracker - Tracking")
             else:
                 self.logger.warning("Failed to start tracking from system tray")
-        except Exception as e:
-            self.logger.error(f"Error starting tracking from tray: {e}")
+                self._sync_menu_state()
     
+    @_logged("pausing tracking from tray")
     def pause_tracking(self, icon, item):
         """Pause eye tracking"""
-        try:
-            success = self.main_app.pause_tracking()
-            if success:
-                self.logger.info("Tracking paused from system tray")
-                self.update_icon_title("Eye Blink Tracker - Paused")
-        except Exception as e:
-            self.logger.error(f"Error pausing tracking from tray: {e}")
+        success = self.main_app.pause_tracking()
+        if success:
+            self._recompute_menu_state(tracking=True, paused=True)
+            self.logger.info("Tracking paused from system tray")
+            self.update_icon_title("Eye Blink Tracker - Paused")
+        else:
+            self._sync_menu_state()
     
+    @_logged("resuming tracking from tray")
     def resume_tracking(self, icon, item):
         """Resume eye tracking"""
-        try:
-            success = self.main_app.resume_tracking()
-            if success:
-                self.logger.info("Tracking resumed from system tray")
-                self.update_icon_title("Eye Blink Tracker - Tracking")
-        except Exception as e:
-            self.logger.error(f"Error resuming tracking from tray: {e}")
+        success = self.main_app.resume_tracking()
+        if success:
+            self._recompute_menu_state(tracking=True, paused=False)
+            self.logger.info("Tracking resumed from system tray")
+            self.update_icon_title("Eye Blink Tracker - Tracking")
+        else:
+            self._sync_menu_state()
     
+    @_logged("stopping tracking from tray")
     def stop_tracking(self, icon, item):
         """Stop eye tracking"""
-        try:
+        with self.batched_updates():
             success = self.main_app.stop_tracking()
             if success:
+                self._recompute_menu_state(tracking=False, paused=False)
                 self.logger.info("Tracking stopped from system tray")
                 self.update_icon_title("Eye Blink Tracker")
-        except Exception as e:
-            self.logger.error(f"Error stopping tracking from tray: {e}")
+            else:
+                self._sync_menu_state()
     
+    @_logged("opening settings")
     def show_settings(self, icon, item):
         """Open settings page"""
-        try:
-            webbrowser.open('http://localhost:5000#settings')
-        except Exception as e:
-            self.logger.error(f"Error opening settings: {e}")
+        webbrowser.open('http://localhost:5000#settings')
     
+    @_logged("opening statistics")
     def show_statistics(self, icon, item):
         """Open statistics page"""
-        try:
-            webbrowser.open('http://localhost:5000#statistics')
-        except Exception as e:
-            self.logger.error(f"Error opening statistics: {e}")
+        webbrowser.open('http://localhost:5000#statistics')
     
+    @_logged("quitting application")
     def quit_application(self, icon, item):
         """Quit the application"""
-        try:
-            self.logger.info("Quit requested from system tray")
-            if self.icon:
-                self.icon.stop()
-            
-            # Shutdown the main application
-            if hasattr(self.main_app, 'shutdown'):
-                self.main_app.shutdown()
-                
-        except Exception as e:
-            self.logger.error(f"Error quitting application: {e}")
+        self.logger.info("Quit requested from system tray")
+        if self.icon:
+            self.icon.stop()
+        
+        # Shutdown the main application
+        if hasattr(self.main_app, 'shutdown'):
+            self.main_app.shutdown()
     
+    @_logged("updating icon image", logging.DEBUG)
+    def update_icon_image(self, state):
+        """Show the icon for a tracking state ('idle', 'tracking' or 'paused')"""
+        if not self.icon:
+            return
+        image = self._state_icons()[state]
+        # Assigning makes pystray push the image to the shell, so only on change
+        if self.icon.icon is not image:
+            self.icon.icon = image
+    
+    @_logged("updating icon title", logging.DEBUG)
     def update_icon_title(self, title):
-        """Update the icon tooltip title"""
+        """Update the icon tooltip title (deferred inside begin_update/end_update)"""
+        with self._update_lock:
+            if self._update_depth:
+                self._pending_title = title
+                return
+        
+        # Each assignment is a Shell_NotifyIcon call on Windows; skip repeats
+        if self.icon and title != self._last_title:
+            self.icon.title = title
+            self._last_title = title
+    
+    def begin_update(self):
+        """Hold tooltip changes until the matching end_update()"""
+        with self._update_lock:
+            self._update_depth += 1
+    
+    def end_update(self):
+        """Apply the last held tooltip once the outermost update ends"""
+        with self._update_lock:
+            self._update_depth -= 1
+            if self._update_depth:
+                return
+            title, self._pending_title = self._pending_title, None
+        if title is not None:
+            self.update_icon_title(title)
+    
+    @contextmanager
+    def batched_updates(self):
+        """Context manager around begin_update()/end_update()"""
+        self.begin_update()
         try:
-            if self.icon:
-                self.icon.title = title
-        except Exception as e:
-            self.logger.debug(f"Error updating icon title: {e}")
+            yield
+        finally:
+            self.end_update()
     
     def run(self):
         """Run the system tray application"""
         try:
-            # Create the icon
-            image = self.create_image()
-            menu = self.create_menu()
-            
-            self.icon = Icon(
-                name="EyeBlinkTracker",
-                icon=image,
-                title="Eye Blink Tracker",
-                menu=menu
-            )
+            # Create the icon and its menu on the first run; later runs after
+            # stop() reuse them
+            if self.icon is None:
+                from pystray import Icon
+                
+                self.icon = Icon(
+                    name="EyeBlinkTracker",
+                    icon=self._state_icons()['idle'],
+                    title="Eye Blink Tracker",
+                    menu=self.create_menu()
+                )
             
             self.logger.info("Starting system tray application")
             
-            # Start periodic tooltip updates
-            self._start_status_updates()
-            
-            # Run the icon (this will block until the application is quit)
-            self.icon.run()
+            # Run the icon (this will block until the application is quit);
+            # tooltip updates start once it is shown
+            self.icon.run(setup=self._on_icon_ready)
             
         except Exception as e:
             self.logger.error(f"Error running system tray: {e}")
             raise
     
+    @_logged("stopping system tray")
     def stop(self):
         """Stop the system tray application"""
-        try:
-            if self.icon:
-                self.icon.stop()
-                self.logger.info("System tray application stopped")
-        except Exception as e:
-            self.logger.error(f"Error stopping system tray: {e}")
+        if self.icon:
+            self.icon.stop()
+            self.logger.info("System tray application stopped")
     
+    @_logged("showing notification", logging.DEBUG)
     def notify(self, title, message):
         """Show a system notification"""
-        try:
-            if self.icon:
-                self.icon.notify(title, message)
-        except Exception as e:
-            self.logger.debug(f"Error showing notification: {e}")
+        if self.icon:
+            self.icon.notify(title, message)
     
+    @_logged("updating status", logging.DEBUG)
     def update_status(self):
         """Update the tray icon based on current status"""
-        try:
-            if not self.main_app:
-                return
-                
-            status = self.main_app.get_status()
-            stats = status.get('tracking_stats', {})
-            
-            # Build tooltip with stats (single line for Windows compatibility)
-            if status['is_tracking']:
-                blinks = stats.get('session_blinks', 0)
-                bpm = stats.get('blinks_per_minute', 0)
-                duration = stats.get('session_duration', 0)
-                
-                # Format duration
-                hours = duration // 3600
-                minutes = (duration % 3600) // 60
-                seconds = duration % 60
-                duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                
-                if self.main_app.blink_detector.is_paused:
-                    tooltip = f"Eye Blink Tracker [PAUSED] | Blinks: {blinks} | Time: {duration_str}"
-                else:
-                    tooltip = f"Eye Blink Tracker [TRACKING] | Blinks: {blinks} | BPM: {bpm:.1f} | Time: {duration_str}"
-            else:
-                tooltip = "Eye Blink Tracker [STOPPED] - Right-click to start"
+        if not self.main_app:
+            return
+        
+        # Skip refreshes that come sooner than STATUS_DEBOUNCE_NS after the last
+        now = time.monotonic_ns()
+        if now - self._last_update_ns < self.STATUS_DEBOUNCE_NS:
+            return
+        self._last_update_ns = now
             
-            self.update_icon_title(tooltip)
-                
-        except Exception as e:
-            self.logger.debug(f"Error updating status: {e}")
+        status = self.main_app.get_status()
+        stats = status.get('tracking_stats', {})
+        
+        tracking = bool(status['is_tracking'])
+        paused = tracking and bool(self.main_app.blink_detector.is_paused)
+        state = int(tracking) + int(paused)
+        
+        # Build tooltip with stats (single line for Windows compatibility)
+        tooltip = _TOOLTIPS[state].format(
+            blinks=stats.get('session_blinks', 0),
+            bpm=stats.get('blinks_per_minute', 0),
+            time=_format_duration(stats.get('session_duration', 0))
+        )
+        
+        self._recompute_menu_state(tracking=tracking, paused=paused)
+        self.update_icon_image(_ICON_STATES[state])
+        self.update_icon_title(tooltip)
+    
+    def _on_icon_ready(self, icon):
+        """pystray setup hook: show the icon, then start tooltip updates"""
+        icon.visible = True
+        self._start_status_updates()
+    
+    def mark_dirty(self):
+        """Signal that tracking state or stats changed, so the tooltip refreshes"""
+        self._status_dirty.set()
     
     def _start_status_updates(self):
-        """Start periodic status updates for tooltip"""
+        """Start status updates for tooltip, driven by mark_dirty"""
+        if self.update_timer and self.update_timer.is_alive():
+            return
+        
         def update_loop():
-            import time
             while self.icon and self.icon.visible:
                 try:
                     self.update_status()
-                    time.sleep(2)  # Update every 2 seconds
+                    # Wake on a change, or after a while to advance the clock
+                    self._status_dirty.wait(timeout=self.STATUS_IDLE_REFRESH)
+                    # Let a burst of changes settle into one refresh
+                    time.sleep(self.STATUS_DEBOUNCE_NS / 1e9)
+                    self._status_dirty.clear()
                 except Exception as e:
-                    self.logger.debug(f"Error in update loop: {e}")
+                    self.logger.debug("Error in update loop: %s", e)
                     break
         
         self.update_timer = threading.Thread(target=update_loop, daemon=True)
@@ -4,14 +4,110 @@ Web Server for Eye Blink Tracker Dashboard
 
 import logging
 import json
+from collections import deque
 from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, current_app, render_template, jsonify, request
 from flask_socketio import SocketIO, emit
 import threading
+import time
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    # Integer-keyed buckets (hourly distribution) and numpy values pass straight through
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.getLogger(__name__).info("orjson not installed - API responses use Flask's jsonify")
+
+
+try:
+    import fastjsonschema
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:
+    FASTJSONSCHEMA_AVAILABLE = False
+    logging.getLogger(__name__).info("fastjsonschema not installed - settings updates are not schema validated")
+
+try:
+    from ciso8601 import parse_datetime as _parse_date
+except ImportError:
+    _parse_date = datetime.fromisoformat
+
+# POST /api/settings fields: value type and the detector setter it feeds, if any
+_SETTINGS_FIELDS = {
+    'ear_threshold': (float, 'set_threshold'),
+    'consecutive_frames': (int, 'set_consecutive_frames'),
+    'glasses_mode': (bool, 'set_glasses_mode'),
+    'show_landmarks': (bool, None),
+    'debug_mode': (bool, 'set_debug_mode'),
+    'adaptive_threshold': (bool, 'set_adaptive_threshold'),
+    'auto_start': (bool, None),
+}
+
+_SCHEMA_TYPES = {float: 'number', int: 'integer', bool: 'boolean'}
+
+SETTINGS_SCHEMA = {
+    'type': 'object',
+    'properties': {key: {'type': _SCHEMA_TYPES[kind]} for key, (kind, _) in _SETTINGS_FIELDS.items()},
+}
+
+if FASTJSONSCHEMA_AVAILABLE:
+    _validate_settings = fastjsonschema.compile(SETTINGS_SCHEMA)
+    _SettingsError = fastjsonschema.JsonSchemaException
+else:
+    def _validate_settings(data):
+        """Pass settings through unchecked; the field types still coerce them"""
+        return data
+    
+    _SettingsError = ValueError
+
+
+def _json(obj):
+    """JSON response for an API route, serialized by orjson when available"""
+    if not ORJSON_AVAILABLE:
+        return jsonify(obj)
+    return current_app.response_class(orjson.dumps(obj, option=_ORJSON_OPTIONS),
+                                      mimetype='application/json')
+
+
+class _OrjsonPackets:
+    """json module stand-in that has Socket.IO packets encoded by orjson"""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        # Stdlib options such as separators are orjson's defaults already
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+    
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+
+def _requested_date():
+    """The ?date= query parameter as a datetime, now if it is absent"""
+    date_str = request.args.get('date')
+    return _parse_date(date_str) if date_str else datetime.now()
+
+
+def _conditional_json(obj):
+    """_json response with an ETag of its body; 304 when the client's copy matches"""
+    response = _json(obj)
+    response.add_etag()
+    return response.make_conditional(request)
 
 class WebServer:
     """Flask web server for the dashboard interface"""
     
+    # How long an /api/status snapshot is shared between pollers
+    STATUS_CACHE_TTL = 0.25  # seconds
+    
+    # Minimum gap between blink_detected pushes; a burst inside it is sent
+    # once, carrying the latest stats
+    BLINK_EMIT_INTERVAL = 0.1  # seconds
+    
+    # How often the background thread recomputes the statistics snapshot
+    STATS_REFRESH_INTERVAL = 5.0  # seconds
+    
     def __init__(self, db_manager, camera_manager, blink_detector, host='localhost', port=5000):
         self.logger = logging.getLogger(__name__)
         self.db_manager = db_manager
@@ -26,9 +122,17 @@ class WebServer:
                         template_folder='../web-app',
                         static_folder='../web-app')
         self.app.config['SECRET_KEY'] = 'eye_blink_tracker_secret_key'
+        # Let browsers reuse dashboard assets for an hour instead of
+        # revalidating every load; send_from_directory still answers
+        # conditional requests with 304
+        self.app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 3600
         
-        # Initialize SocketIO for real-time updates
-        self.socketio = SocketIO(self.app, cors_allowed_origins="*")
+        # Initialize SocketIO for real-time updates. Threading mode explicitly:
+        # eventlet/gevent would need monkey patching, which turns the camera,
+        # detection and database threads into green threads.
+        socketio_options = {'json': _OrjsonPackets} if ORJSON_AVAILABLE else {}
+        self.socketio = SocketIO(self.app, cors_allowed_origins="*", async_mode='threading',
+                                 **socketio_options)
         
         # Setup routes
         self._setup_routes()
@@ -36,6 +140,25 @@ class WebServer:
         
         self.is_running = False
         
+        # Latest status for SocketIO clients, replaced by a fresh dict on every
+        # update so the sender never emits a half-rewritten one. The background
+        # sender emits it when _status_queued is set; only the newest status
+        # matters, as with the pending blink where older unsent ones are dropped.
+        self._status_buf = {'is_tracking': False, 'is_paused': False, 'stats': {}}
+        self._status_queued = False
+        self._pending_blink = deque(maxlen=1)
+        self._status_ready = threading.Event()
+        
+        # Last /api/status snapshot and when it was built; cleared by the
+        # routes that change tracking or camera state
+        self._status_cache = (0.0, None)
+        
+        # Precomputed statistics for today (keyed by ISO date) and the summary,
+        # replaced whole by the refresh thread
+        self._stats_snapshot = {'daily': {}, 'weekly': {}, 'summary': None}
+        self._snapshot_lock = threading.Lock()
+        self._stats_invalidated = threading.Event()
+        
     def _setup_routes(self):
         """Setup Flask routes"""
         
@@ -59,47 +182,53 @@ class WebServer:
         def get_status():
             """Get current application status"""
             try:
-                status = {
-                    'is_tracking': self.blink_detector.is_detecting,
-                    'is_paused': self.blink_detector.is_paused,
-                    'camera_available': self.camera_manager.is_camera_available(),
-                    'active_camera': self.camera_manager.get_active_camera_info(),
-                    'stats': self.blink_detector.get_stats()
-                }
-                return jsonify(status)
+                now = time.monotonic()
+                built, status = self._status_cache
+                if status is None or now - built >= self.STATUS_CACHE_TTL:
+                    status = {
+                        'is_tracking': self.blink_detector.is_detecting,
+                        'is_paused': self.blink_detector.is_paused,
+                        'camera_available': self.camera_manager.is_camera_available(),
+                        'active_camera': self.camera_manager.get_active_camera_info(),
+                        'stats': self.blink_detector.get_stats()
+                    }
+                    self._status_cache = (now, status)
+                return _json(status)
             except Exception as e:
                 self.logger.error(f"Error getting status: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/cameras')
         def get_cameras():
             """Get available cameras"""
             try:
                 cameras = self.camera_manager.get_available_cameras()
-                return jsonify(cameras)
+                return _json(cameras)
             except Exception as e:
                 self.logger.error(f"Error getting cameras: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/cameras/refresh')
         def refresh_cameras():
             """Refresh camera list"""
             try:
                 cameras = self.camera_manager.refresh_and_get_cameras()
-                return jsonify(cameras)
+                self._invalidate_status()
+                return _json(cameras)
             except Exception as e:
                 self.logger.error(f"Error refreshing cameras: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/cameras/select/<int:camera_index>', methods=['POST'])
         def select_camera(camera_index):
             """Select a specific camera"""
             try:
                 success = self.camera_manager.select_camera(camera_index)
-                return jsonify({'success': success})
+                self._invalidate_status()
+                return _json({'success': success})
             except Exception as e:
                 self.logger.error(f"Error selecting camera: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/tracking/start', methods=['POST'])
         def start_tracking():
@@ -109,82 +238,79 @@ class WebServer:
                 from app import EyeBlinkTrackerApp
                 # In a real implementation, we'd need a better way to access the main app
                 success = True  # Placeholder
-                return jsonify({'success': success})
+                return _json({'success': success})
             except Exception as e:
                 self.logger.error(f"Error starting tracking: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/tracking/pause', methods=['POST'])
         def pause_tracking():
             """Pause eye tracking"""
             try:
                 success = self.blink_detector.pause() if self.blink_detector.is_detecting else False
-                return jsonify({'success': success})
+                self._invalidate_status()
+                return _json({'success': success})
             except Exception as e:
                 self.logger.error(f"Error pausing tracking: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/tracking/resume', methods=['POST'])
         def resume_tracking():
             """Resume eye tracking"""
             try:
                 success = self.blink_detector.resume() if self.blink_detector.is_detecting else False
-                return jsonify({'success': success})
+                self._invalidate_status()
+                return _json({'success': success})
             except Exception as e:
                 self.logger.error(f"Error resuming tracking: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/tracking/stop', methods=['POST'])
         def stop_tracking():
             """Stop eye tracking"""
             try:
                 self.blink_detector.stop_detection()
-                return jsonify({'success': True})
+                self._invalidate_status()
+                self.invalidate_stats()
+                return _json({'success': True})
             except Exception as e:
                 self.logger.error(f"Error stopping tracking: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/statistics/daily')
         def get_daily_stats():
             """Get daily statistics"""
             try:
-                date_str = request.args.get('date')
-                if date_str:
-                    date = datetime.fromisoformat(date_str)
-                else:
-                    date = datetime.now()
-                
-                stats = self.db_manager.get_daily_stats(date)
-                return jsonify(stats)
+                date = _requested_date()
+                stats = self._snapshot_stats('daily', date)
+                return _conditional_json(stats)
             except Exception as e:
                 self.logger.error(f"Error getting daily stats: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/statistics/weekly')
         def get_weekly_stats():
             """Get weekly statistics"""
             try:
-                date_str = request.args.get('date')
-                if date_str:
-                    date = datetime.fromisoformat(date_str)
-                else:
-                    date = datetime.now()
-                
-                stats = self.db_manager.get_weekly_stats(date)
-                return jsonify(stats)
+                date = _requested_date()
+                stats = self._snapshot_stats('weekly', date)
+                return _conditional_json(stats)
             except Exception as e:
                 self.logger.error(f"Error getting weekly stats: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/statistics/summary')
         def get_statistics_summary():
             """Get comprehensive statistics summary"""
             try:
-                summary = self.db_manager.get_statistics_summary()
-                return jsonify(summary)
+                with self._snapshot_lock:
+                    summary = self._stats_snapshot['summary']
+                if not summary:
+                    summary = self.db_manager.get_statistics_summary()
+                return _conditional_json(summary)
             except Exception as e:
                 self.logger.error(f"Error getting statistics summary: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/sessions')
         def get_sessions():
@@ -192,10 +318,10 @@ class WebServer:
             try:
                 limit = request.args.get('limit', 10, type=int)
                 sessions = self.db_manager.get_recent_sessions(limit)
-                return jsonify(sessions)
+                return _conditional_json(sessions)
             except Exception as e:
                 self.logger.error(f"Error getting sessions: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
         
         @self.app.route('/api/settings', methods=['GET', 'POST'])
         def handle_settings():
@@ -212,50 +338,72 @@ class WebServer:
                         'adaptive_threshold': self.db_manager.get_setting('adaptive_threshold', 'true') == 'true',
                         'auto_start': self.db_manager.get_setting('auto_start', 'false') == 'true'
                     }
-                    return jsonify(settings)
+                    return _json(settings)
                 
                 elif request.method == 'POST':
-                    # Update settings
-                    data = request.get_json()
-                    
-                    if 'ear_threshold' in data:
-                        threshold = float(data['ear_threshold'])
-                        self.blink_detector.set_threshold(threshold)
-                        self.db_manager.set_setting('ear_threshold', str(threshold))
-                    
-                    if 'consecutive_frames' in data:
-                        frames = int(data['consecutive_frames'])
-                        self.blink_detector.set_consecutive_frames(frames)
-                        self.db_manager.set_setting('consecutive_frames', str(frames))
+                    # Update settings, validated against SETTINGS_SCHEMA
+                    try:
+                        data = _validate_settings(request.get_json())
+                    except _SettingsError as e:
+                        return _json({'error': str(e)}), 400
                     
-                    if 'glasses_mode' in data:
-                        glasses_mode = bool(data['glasses_mode'])
-                        self.blink_detector.set_glasses_mode(glasses_mode)
-                        self.db_manager.set_setting('glasses_mode', str(glasses_mode).lower())
+                    settings = {}
+                    for key, (kind, setter) in _SETTINGS_FIELDS.items():
+                        if key in data:
+                            value = kind(data[key])
+                            if setter:
+                                getattr(self.blink_detector, setter)(value)
+                            settings[key] = str(value).lower() if kind is bool else str(value)
                     
-                    if 'show_landmarks' in data:
-                        show_landmarks = bool(data['show_landmarks'])
-                        self.db_manager.set_setting('show_landmarks', str(show_landmarks).lower())
+                    # Commit all changed settings in one transaction
+                    self.db_manager.set_settings(settings)
                     
-                    if 'debug_mode' in data:
-                        debug_mode = bool(data['debug_mode'])
-                        self.blink_detector.set_debug_mode(debug_mode)
-                        self.db_manager.set_setting('debug_mode', str(debug_mode).lower())
-                    
-                    if 'adaptive_threshold' in data:
-                        adaptive = bool(data['adaptive_threshold'])
-                        self.blink_detector.set_adaptive_threshold(adaptive)
-                        self.db_manager.set_setting('adaptive_threshold', str(adaptive).lower())
-                    
-                    if 'auto_start' in data:
-                        auto_start = bool(data['auto_start'])
-                        self.db_manager.set_setting('auto_start', str(auto_start).lower())
-                    
-                    return jsonify({'success': True})
+                    return _json({'success': True})
                     
             except Exception as e:
                 self.logger.error(f"Error handling settings: {e}")
-                return jsonify({'error': str(e)}), 500
+                return _json({'error': str(e)}), 500
+    
+    def _invalidate_status(self):
+        """Drop the cached /api/status snapshot so the next poll rebuilds it"""
+        self._status_cache = (0.0, None)
+    
+    def _snapshot_stats(self, kind, date):
+        """Daily or weekly stats from the snapshot, queried if not precomputed"""
+        with self._snapshot_lock:
+            stats = self._stats_snapshot[kind].get(date.date().isoformat())
+        if not stats:
+            query = self.db_manager.get_daily_stats if kind == 'daily' else self.db_manager.get_weekly_stats
+            stats = query(date)
+        return stats
+    
+    def _refresh_stats_snapshot(self):
+        """Recompute today's daily and weekly stats and the summary"""
+        try:
+            now = datetime.now()
+            today = now.date().isoformat()
+            snapshot = {
+                'daily': {today: self.db_manager.get_daily_stats(now)},
+                'weekly': {today: self.db_manager.get_weekly_stats(now)},
+                'summary': self.db_manager.get_statistics_summary()
+            }
+            with self._snapshot_lock:
+                self._stats_snapshot = snapshot
+        except Exception as e:
+            self.logger.error(f"Error refreshing statistics snapshot: {e}")
+    
+    def _stats_refresh_loop(self):
+        """Keep the statistics snapshot fresh for the statistics routes"""
+        while self.is_running:
+            self._refresh_stats_snapshot()
+            self._stats_invalidated.wait(timeout=self.STATS_REFRESH_INTERVAL)
+            self._stats_invalidated.clear()
+    
+    def invalidate_stats(self):
+        """Drop the statistics snapshot and have it recomputed now, e.g. after a session ends"""
+        with self._snapshot_lock:
+            self._stats_snapshot = {'daily': {}, 'weekly': {}, 'summary': None}
+        self._stats_invalidated.set()
     
     def _setup_socketio_events(self):
         """Setup SocketIO events for real-time updates"""
@@ -265,60 +413,123 @@ class WebServer:
             """Handle client connection"""
             self.logger.info("Client connected to WebSocket")
             emit('status', {'message': 'Connected to Eye Blink Tracker'})
+            # Later updates are pushed by the server; send the initial state now
+            try:
+                emit('status_update', self._status_payload())
+            except Exception as e:
+                self.logger.error(f"Error sending status update: {e}")
         
         @self.socketio.on('disconnect')
         def handle_disconnect():
             """Handle client disconnection"""
             self.logger.info("Client disconnected from WebSocket")
-        
-        @self.socketio.on('request_status')
-        def handle_status_request():
-            """Handle status request from client"""
-            try:
-                status = {
-                    'is_tracking': self.blink_detector.is_detecting,
-                    'is_paused': self.blink_detector.is_paused,
-                    'stats': self.blink_detector.get_stats()
-                }
-                emit('status_update', status)
-            except Exception as e:
-                self.logger.error(f"Error sending status update: {e}")
     
     def broadcast_blink_detected(self):
-        """Broadcast blink detection to connected clients"""
+        """Broadcast blink detection to connected clients (rate limited by the sender)"""
         try:
-            if hasattr(self, 'socketio'):
-                stats = self.blink_detector.get_stats()
-                self.socketio.emit('blink_detected', stats)
+            self.queue_blink_detected(self.blink_detector.get_stats())
         except Exception as e:
             self.logger.error(f"Error broadcasting blink: {e}")
     
+    def _status_payload(self, stats=None):
+        """Build a new status payload, fetching stats if not given"""
+        if stats is None:
+            stats = self.blink_detector.get_stats()
+        return {
+            'is_tracking': self.blink_detector.is_detecting,
+            'is_paused': self.blink_detector.is_paused,
+            'stats': stats,
+        }
+    
     def broadcast_status_update(self):
         """Broadcast status update to connected clients"""
         try:
             if hasattr(self, 'socketio'):
-                status = {
-                    'is_tracking': self.blink_detector.is_detecting,
-                    'is_paused': self.blink_detector.is_paused,
-                    'stats': self.blink_detector.get_stats()
-                }
-                self.socketio.emit('status_update', status)
+                self.socketio.emit('status_update', self._status_payload())
         except Exception as e:
             self.logger.error(f"Error broadcasting status: {e}")
     
+    def queue_status_update(self, stats=None):
+        """
+        Queue a status update for the background sender
+        
+        Unlike broadcast_status_update this never blocks the caller on
+        network sends to connected clients.
+        
+        Args:
+            stats: Detector statistics snapshot, fetched if not given
+        """
+        # Swapped in with one assignment, never modified after
+        self._status_buf = self._status_payload(stats)
+        self._status_queued = True
+        self._status_ready.set()
+    
+    def queue_blink_detected(self, stats):
+        """
+        Queue a blink_detected push for the background sender
+        
+        Args:
+            stats: Detector statistics snapshot including the new blink
+        """
+        self._pending_blink.append(stats)
+        self._status_ready.set()
+    
+    def _status_sender_loop(self):
+        """Send queued status updates to connected clients"""
+        next_blink_emit = 0.0
+        while self.is_running:
+            if not self._status_ready.wait(timeout=1.0):
+                continue
+            self._status_ready.clear()
+            
+            if self._pending_blink:
+                # Blinks queued while waiting out the interval replace the
+                # pending one, so a burst goes out as one push
+                delay = next_blink_emit - time.monotonic()
+                if delay > 0:
+                    self.socketio.sleep(delay)
+                try:
+                    self.socketio.emit('blink_detected', self._pending_blink.popleft())
+                except IndexError:
+                    pass
+                except Exception as e:
+                    self.logger.error(f"Error sending blink_detected: {e}")
+                next_blink_emit = time.monotonic() + self.BLINK_EMIT_INTERVAL
+                # Let the server service other clients between sends
+                self.socketio.sleep(0)
+            
+            if self._status_queued:
+                self._status_queued = False
+                # Read the buffer once; a newer update replaces it instead
+                # of changing the payload being sent
+                payload = self._status_buf
+                try:
+                    self.socketio.emit('status_update', payload)
+                except Exception as e:
+                    self.logger.error(f"Error sending status update: {e}")
+    
     def run(self):
         """Run the web server"""
         try:
             self.is_running = True
             self.logger.info(f"Starting web server on {self.host}:{self.port}")
             
-            # Run SocketIO app
+            # Start the sender for queued status updates
+            self.socketio.start_background_task(self._status_sender_loop)
+            
+            # Precompute the statistics the dashboard polls
+            self.socketio.start_background_task(self._stats_refresh_loop)
+            
+            # Run SocketIO app. Werkzeug serves each request on its own thread;
+            # it is only reachable locally, so allow it when started without a
+            # console (Flask-SocketIO refuses otherwise)
             self.socketio.run(
                 self.app,
                 host=self.host,
                 port=self.port,
                 debug=False,
-                use_reloader=False
+                use_reloader=False,
+                allow_unsafe_werkzeug=True
             )
             
         except Exception as e:
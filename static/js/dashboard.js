@@ -32,7 +32,6 @@ function initializeWebSocket() {
         console.log('Connected to server');
         isConnected = true;
         updateStatusIndicator('Connected', 'status-connected');
-        socket.emit('request_status');
     });
     
     socket.on('disconnect', function() {
@@ -51,6 +50,7 @@ function initializeWebSocket() {
     
     socket.on('blink_detected', function(data) {
         console.log('Blink detected:', data);
+        currentStatus.stats = data;
         animateBlinkDetection();
         updateSessionStats();
     });
@@ -6,7 +6,11 @@ No dlib required - uses OpenCV Haar Cascades only
 
 import cv2
 import numpy as np
+import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Add src to path
@@ -16,6 +20,12 @@ from camera_manager import CameraManager
 from database import DatabaseManager
 from blink_detector_opencv import BlinkDetectorOpenCV
 
+# Rows of the preview covered by the cached status panel
+HUD_ROWS = 160
+
+# Preview refresh cap; detection still runs on every captured frame
+SHOW_FPS = 30
+
 def main():
     print("="*60)
     print("Eye Blink Tracker - OpenCV Mode (No dlib)")
@@ -26,6 +36,18 @@ def main():
     print("  r - Reset counter")
     print("\n" + "="*60)
     
+    # camera_manager runs OpenCV single-threaded for the app's pinned
+    # pipeline; this loop is the only worker, so let the cascades use a few
+    # cores (OpenCV builds without TBB/OpenMP ignore this)
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(max(2, (os.cpu_count() or 2) // 2))
+    
+    # As in the app, the detector's cvtColor, resize and cascade calls take
+    # UMat, so with OpenCL they run on the iGPU; the preview stays on the CPU
+    use_opencl = cv2.ocl.haveOpenCL()
+    if use_opencl:
+        cv2.ocl.setUseOpenCL(True)
+    
     try:
         # Initialize
         print("\n[1/4] Initializing database...")
@@ -62,84 +84,140 @@ def main():
         detector.start_detection(camera)
         
         frame_count = 0
+        display = None  # preview buffer, reused while the frame size holds
+        hud_values = None  # values drawn on hud_panel, rows 0-HUD_ROWS of the display
+        hud_panel = hud_mask = None
+        last_show = 0.0  # perf_counter time the preview was last shown
+        
+        # Capture on its own thread so camera reads overlap detection; the
+        # 1-slot queue holds only the newest frame not yet processed
+        frames = queue.Queue(maxsize=1)
+        capturing = threading.Event()
+        capturing.set()
+        
+        # Frame buffers cycle back to the capture thread instead of being
+        # reallocated: at most one is read into, one queued and one processed
+        free_buffers = queue.SimpleQueue()
+        
+        def capture_loop():
+            while capturing.is_set():
+                try:
+                    buf = free_buffers.get_nowait()
+                except queue.Empty:
+                    buf = None
+                ret, frame = camera.read(buf) if buf is not None else camera.read()
+                if not ret:
+                    if buf is not None:
+                        free_buffers.put(buf)
+                    print("WARNING: Cannot read frame")
+                    time.sleep(0.01)
+                    continue
+                try:
+                    # Drop the frame detection didn't reach, reusing its buffer
+                    free_buffers.put(frames.get_nowait())
+                except queue.Empty:
+                    pass
+                frames.put(frame)
         
+        capture_thread = threading.Thread(target=capture_loop, daemon=True)
+        capture_thread.start()
+        
+        frame = None
         while True:
-            ret, frame = camera.read()
-            if not ret:
-                print("WARNING: Cannot read frame")
+            try:
+                next_frame = frames.get(timeout=1.0)
+            except queue.Empty:
                 continue
+            if frame is not None:
+                free_buffers.put(frame)  # done with the previous frame
+            frame = next_frame
             
             frame_count += 1
             
             # Process for blink detection
-            detector.process_frame(frame)
-            
-            # Create display
-            display = frame.copy()
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            detector.process_frame(cv2.UMat(frame) if use_opencl else frame)
             
-            # Detect faces
-            faces = detector.face_cascade.detectMultiScale(
-                gray, 1.1, 5, minSize=(50, 50)
-            )
+            # Live stats are plain detector attributes; get_stats() would build
+            # a dict every frame
+            eyes_detected = detector.eyes_detected
+            blink_count = detector.session_blinks
+            bpm = detector.blinks_per_minute
             
-            # Draw face and eyes
-            for (x, y, w, h) in faces:
-                cv2.rectangle(display, (x, y), (x+w, y+h), (255, 0, 0), 2)
+            # Redraw and show the preview at most SHOW_FPS times a second;
+            # in between only poll the keyboard
+            now = time.perf_counter()
+            if now - last_show >= 1.0 / SHOW_FPS:
+                last_show = now
                 
-                # Detect eyes
-                roi_gray = gray[y:y+h, x:x+w]
-                eyes = detector.eye_cascade.detectMultiScale(
-                    roi_gray, 1.1, 5, minSize=(20, 20)
-                )
+                # Draw on a half-size copy: a quarter of the pixels to write and show
+                preview_size = (frame.shape[1] // 2, frame.shape[0] // 2)
+                if display is None or display.shape[1::-1] != preview_size:
+                    display = np.empty((preview_size[1], preview_size[0], 3), dtype=np.uint8)
+                cv2.resize(frame, preview_size, dst=display)
                 
-                for (ex, ey, ew, eh) in eyes:
-                    cv2.rectangle(display, (x+ex, y+ey), 
-                                (x+ex+ew, y+ey+eh), (0, 255, 0), 2)
-            
-            # Get stats
-            stats = detector.get_stats()
-            
-            # Display info
-            cv2.putText(display, f"Frame: {frame_count}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            
-            cv2.putText(display, f"Faces: {len(faces)}", (10, 60),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            
-            eyes_text = "YES" if stats.get('eyes_detected', False) else "NO"
-            eyes_color = (0, 255, 0) if stats.get('eyes_detected', False) else (0, 0, 255)
-            cv2.putText(display, f"Eyes: {eyes_text}", (10, 90),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, eyes_color, 2)
-            
-            blink_count = stats.get('session_blinks', 0)
-            cv2.putText(display, f"BLINKS: {blink_count}", (10, 120),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-            
-            bpm = stats.get('blinks_per_minute', 0)
-            cv2.putText(display, f"BPM: {bpm:.1f}", (10, 150),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-            
-            # Instructions
-            cv2.putText(display, "q=quit  r=reset", (10, display.shape[0]-10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Show
-            cv2.imshow('Blink Tracker', display)
+                # Reuse the face and eyes the detector just found
+                faces, eyes = detector.last_faces, detector.last_eyes
+                
+                # Draw face and eyes, scaling the boxes to the display
+                for (x, y, w, h) in faces:
+                    cv2.rectangle(display, (x//2, y//2), ((x+w)//2, (y+h)//2), (255, 0, 0), 2)
+                
+                    for (ex, ey, ew, eh) in eyes:
+                        cv2.rectangle(display, ((x+ex)//2, (y+ey)//2), 
+                                    ((x+ex+ew)//2, (y+ey+eh)//2), (0, 255, 0), 2)
+                
+                # Display info; the lines below the frame counter only change on
+                # detection events, so they are rendered once into a panel
+                values = (display.shape[1], len(faces), eyes_detected, blink_count, f"{bpm:.1f}")
+                if values != hud_values:
+                    hud_panel = np.zeros((HUD_ROWS, display.shape[1], 3), dtype=np.uint8)
+                
+                    cv2.putText(hud_panel, f"Faces: {len(faces)}", (10, 60),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                
+                    eyes_text = "YES" if eyes_detected else "NO"
+                    eyes_color = (0, 255, 0) if eyes_detected else (0, 0, 255)
+                    cv2.putText(hud_panel, f"Eyes: {eyes_text}", (10, 90),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, eyes_color, 2)
+                
+                    cv2.putText(hud_panel, f"BLINKS: {blink_count}", (10, 120),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+                
+                    cv2.putText(hud_panel, f"BPM: {values[-1]}", (10, 150),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+                
+                    # Text pixels only; the panel's black background is not copied
+                    hud_mask = hud_panel.any(axis=2, keepdims=True)
+                    hud_values = values
+                
+                np.copyto(display[:HUD_ROWS], hud_panel, where=hud_mask)
+                cv2.putText(display, f"Frame: {frame_count}", (10, 30),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                
+                # Instructions
+                cv2.putText(display, "q=quit  r=reset", (10, display.shape[0]-10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                
+                # Show
+                cv2.imshow('Blink Tracker', display)
+                key = cv2.waitKey(1) & 0xFF
+            else:
+                key = cv2.pollKey() & 0xFF
             
             # Print to console every 100 frames
             if frame_count % 100 == 0:
                 print(f"Frames: {frame_count} | Blinks: {blink_count} | BPM: {bpm:.1f}")
             
             # Keys
-            key = cv2.waitKey(1) & 0xFF
             if key == ord('q'):
                 break
             elif key == ord('r'):
                 detector.reset_session_stats()
                 print("Counter reset!")
         
-        # Cleanup
+        # Cleanup; the capture thread must be done with the camera first
+        capturing.clear()
+        capture_thread.join(timeout=2)
         detector.stop_detection()
         camera_manager.release_camera()
         cv2.destroyAllWindows()